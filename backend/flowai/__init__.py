@@ -3,7 +3,15 @@
 
 from .engine import FlowAIEngine, AnalysisMode, AnalysisResult
 from .models import ModelRegistry, ModelCapability
-from .core import FlowAICore, get_flowai_core, RiskAssessment, RiskGrade
+from .core import DocumentDigest, ExtractionLimits, FlowAICore, FeatureAccumulator, ModelArtifact, ModelParams, get_flowai_core, reload_flowai_core, RiskAssessment, RiskGrade
+from .batch import BatchAssessment
+from .store import FeatureTable
+from .cache import ResultCache
+from .dedup import NearDuplicateIndex
+from .counterparty import CounterpartyIndex
+from .online import OnlineCalibrator
+from .lexicon import Lexicon
+from .timing import StepTimer
 
 __version__ = "1.0.0"
 __all__ = [
@@ -13,8 +21,22 @@ __all__ = [
     "ModelRegistry",
     "ModelCapability",
     "FlowAICore",
+    "FeatureAccumulator",
+    "DocumentDigest",
+    "ExtractionLimits",
+    "ModelArtifact",
+    "ModelParams",
     "get_flowai_core",
+    "reload_flowai_core",
     "RiskAssessment",
     "RiskGrade",
+    "BatchAssessment",
+    "FeatureTable",
+    "ResultCache",
+    "NearDuplicateIndex",
+    "CounterpartyIndex",
+    "OnlineCalibrator",
+    "Lexicon",
+    "StepTimer",
 ]
 
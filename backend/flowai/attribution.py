@@ -0,0 +1,208 @@
+"""
+FlowAI Feature Attribution
+Additive per-feature contributions to the Z-Score, DD, PD and Quantum Score
+
+Every score is explained relative to a reference invoice (by default an
+empty one, InvoiceFeatures()): the contributions of an invoice's features
+sum exactly to its score minus the reference's score. They are Shapley
+values over the feature groups of ATTRIBUTION_GROUPS, the one additive
+split that is fair to features which interact (DD mixes amount, terms and
+completeness; lateness needs both age and terms; the PD clips; market risk
+depends on the Z-Score).
+
+Exact Shapley values need each score with every subset of features taken
+from the invoice and the rest from the reference, 2^9 = 512 variants. All
+of them are scored at once by the batch kernels (batch.py), broadcasting an
+(invoices, 512) grid, and the contributions are one matrix product of those
+scores with a fixed (512, 9) weight matrix:
+
+    attribution = core.attribute(features)    # one invoice, a list or a FeatureTable
+    attribution.contributions['probability_of_default']    # (invoices, 9)
+    attribution.for_invoice(0)['quantum_score']['contributions']['amount']
+
+Invoices are processed in chunks of about CHUNK_CELLS variants, so memory
+stays bounded (about 40MB) for any batch size.
+"""
+
+from dataclasses import dataclass
+from math import factorial
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batch import (
+    distance_to_default, feature_score, features_to_columns, lateness,
+    modified_zscore, probability_of_default, quantum_score,
+)
+from .core import InvoiceFeatures, ModelParams
+from .store import FeatureTable
+
+# Feature groups that receive a contribution, and the scoring columns each
+# one covers ('industry' is the industry PD multiplier). Together they
+# cover every SCORING_COLUMNS entry, so no difference goes unexplained.
+ATTRIBUTION_GROUPS: Dict[str, Tuple[str, ...]] = {
+    'amount': ('amount',),
+    'payment_terms': ('payment_terms_days',),
+    'invoice_age': ('age_days',),
+    'text_length': ('text_length',),
+    'verification': ('has_address', 'has_tax_id', 'has_bank_details'),
+    'sentiment': ('sentiment_score',),
+    'formality': ('formality_score',),
+    'completeness': ('completeness_score',),
+    'industry': ('industry_risk',),
+}
+
+# Scores that are explained, as named in BatchAssessment
+ATTRIBUTED_SCORES = ('z_score', 'distance_to_default', 'probability_of_default', 'quantum_score')
+
+# Invoice x variant cells scored per chunk
+CHUNK_CELLS = 1 << 18
+
+_INDUSTRY = 'industry_risk'
+
+
+def _coalitions(groups: int) -> np.ndarray:
+    """(2^groups, groups) membership matrix; row m holds the bits of m."""
+    return (np.arange(1 << groups)[:, None] >> np.arange(groups)) & 1 == 1
+
+
+def shapley_weights(groups: int) -> np.ndarray:
+    """
+    (2^groups, groups) matrix W with phi = f @ W for f the scores of all
+    coalitions (as numbered by `_coalitions`).
+
+    W[m, j] is s!(n-s-1)!/n! with s = |m| - 1 if j is in m, and minus that
+    weight with s = |m| otherwise.
+    """
+    member = _coalitions(groups)
+    size = member.sum(axis=1)
+    weight = np.array([
+        factorial(s) * factorial(groups - s - 1) / factorial(groups) for s in range(groups)
+    ] + [0.0])
+    return np.where(member, weight[size - 1][:, None], -weight[size][:, None])
+
+
+@dataclass
+class Attribution:
+    """Per-feature contributions to the scores of a batch of invoices"""
+    groups: Tuple[str, ...]
+    # Score name (ATTRIBUTED_SCORES) -> reference invoice's score
+    baseline: Dict[str, float]
+    # Score name -> invoices' scores, shape (invoices,)
+    values: Dict[str, np.ndarray]
+    # Score name -> contributions, shape (invoices, groups); each row sums
+    # to the invoice's value minus the baseline
+    contributions: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.values['probability_of_default'])
+
+    def for_invoice(self, index: int) -> Dict[str, Dict[str, object]]:
+        """Plain-dict explanation of one invoice (JSON-serializable)."""
+        return {
+            score: {
+                'baseline': self.baseline[score],
+                'value': float(self.values[score][index]),
+                'contributions': dict(zip(self.groups, self.contributions[score][index].tolist())),
+            }
+            for score in ATTRIBUTED_SCORES
+        }
+
+
+def _scores(
+    cols: Mapping[str, np.ndarray],
+    params: ModelParams,
+    feature_weights: Optional[Mapping[str, float]]
+) -> Dict[str, np.ndarray]:
+    industry_risk = cols[_INDUSTRY]
+    z_score = modified_zscore(cols, params)
+    dd = distance_to_default(cols, params)
+    score = feature_score(cols, params, industry_risk, feature_weights)
+    pd = probability_of_default(z_score, dd, params, industry_risk, score, lateness(cols, params))
+    quantum, _ = quantum_score(cols, z_score, pd)
+    return {
+        'z_score': z_score,
+        'distance_to_default': dd,
+        'probability_of_default': pd,
+        'quantum_score': quantum,
+    }
+
+
+def attribute_columns(
+    cols: Mapping[str, np.ndarray],
+    baseline: Mapping[str, np.ndarray],
+    params: ModelParams,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> Attribution:
+    """
+    Shapley contributions of ATTRIBUTION_GROUPS for feature columns.
+
+    Args:
+        cols: Scoring columns plus 'industry_risk' (per-invoice PD multiplier)
+        baseline: The same columns for the reference invoice, length one
+        params: Model parameters
+        feature_weights: FEATURE_WEIGHTS of the model's feature score
+
+    Returns:
+        Attribution
+    """
+    groups = tuple(ATTRIBUTION_GROUPS)
+    member = _coalitions(len(groups))
+    weights = shapley_weights(len(groups))
+    variants = len(member)
+    n = len(cols['amount'])
+    chunk = max(1, CHUNK_CELLS // variants)
+
+    values = {score: np.empty(n) for score in ATTRIBUTED_SCORES}
+    contributions = {score: np.empty((n, len(groups))) for score in ATTRIBUTED_SCORES}
+    for start in range(0, n, chunk):
+        stop = min(n, start + chunk)
+        # Column c of group j: the invoice's value where j is in the
+        # coalition, the reference's elsewhere -> (chunk, variants)
+        grid = {
+            name: np.where(member[:, j], cols[name][start:stop, None], baseline[name][:, None])
+            for j, group in enumerate(groups) for name in ATTRIBUTION_GROUPS[group]
+        }
+        for score, table in _scores(grid, params, feature_weights).items():
+            values[score][start:stop] = table[:, -1]
+            contributions[score][start:stop] = table @ weights
+
+    reference = _scores({name: col[:, None] for name, col in baseline.items()}, params, feature_weights)
+    return Attribution(
+        groups=groups,
+        baseline={score: float(reference[score][0, 0]) for score in ATTRIBUTED_SCORES},
+        values=values,
+        contributions=contributions,
+    )
+
+
+def attribute(
+    features: Union[InvoiceFeatures, Sequence[InvoiceFeatures], FeatureTable],
+    params: ModelParams,
+    industry_risk: Union[float, np.ndarray] = 1.0,
+    reference: Optional[InvoiceFeatures] = None,
+    reference_industry_risk: float = 1.0,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> Attribution:
+    """
+    Explain the scores of invoices as additive per-feature contributions.
+
+    Args:
+        features: One invoice's features, a sequence, or a FeatureTable
+        params: Model parameters
+        industry_risk: PD multiplier per invoice (or one for all)
+        reference: Invoice the contributions are measured from (default:
+            InvoiceFeatures())
+        reference_industry_risk: The reference invoice's PD multiplier
+        feature_weights: FEATURE_WEIGHTS of the model's feature score
+
+    Returns:
+        Attribution with one row per invoice
+    """
+    if isinstance(features, InvoiceFeatures):
+        features = [features]
+    cols = dict(features.columns() if isinstance(features, FeatureTable) else features_to_columns(features))
+    cols[_INDUSTRY] = np.broadcast_to(np.asarray(industry_risk, dtype=np.float64), cols['amount'].shape)
+    baseline = features_to_columns([reference if reference is not None else InvoiceFeatures()])
+    baseline[_INDUSTRY] = np.array([reference_industry_risk], dtype=np.float64)
+    return attribute_columns(cols, baseline, params, feature_weights)
@@ -0,0 +1,316 @@
+"""
+FlowAI Batch Scoring
+Vectorized NumPy kernels mirroring the FlowAI Core scoring pipeline
+
+Every kernel takes a mapping of feature columns (one array per InvoiceFeatures
+field) and evaluates the same formula as its scalar counterpart in
+FlowAICore for all invoices at once:
+
+- modified_zscore          <- FlowAICore.calculate_modified_zscore
+- distance_to_default      <- FlowAICore.calculate_distance_to_default
+- feature_signals          <- FlowAICore.calculate_feature_signals
+- feature_score            <- FlowAICore.calculate_feature_score
+- probability_of_default   <- FlowAICore.calculate_probability_of_default
+- quantum_score            <- FlowAICore.calculate_quantum_score
+- grade_index              <- FlowAICore.pd_to_grade
+- confidence               <- FlowAICore.calculate_confidence
+- valuation                <- FlowAICore.estimate_valuation
+
+Kernels that depend on model parameters take a ModelParams (default:
+DEFAULT_PARAMS), as their scalar counterparts do. Industry risk multipliers
+and feature weights come from the engine's model artifact; multipliers are
+passed in per invoice (FlowAICore.industry_risk_factor).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .core import DEFAULT_PARAMS, FEATURE_WEIGHTS, PD_THRESHOLDS, InvoiceFeatures, ModelParams, RiskGrade
+
+# InvoiceFeatures fields read by the scoring kernels, with their array dtype
+SCORING_COLUMNS: Dict[str, type] = {
+    'amount': np.float64,
+    'payment_terms_days': np.float64,
+    'age_days': np.float64,
+    'text_length': np.float64,
+    'completeness_score': np.float64,
+    'formality_score': np.float64,
+    'sentiment_score': np.float64,
+    'has_address': np.bool_,
+    'has_tax_id': np.bool_,
+    'has_bank_details': np.bool_,
+}
+
+Columns = Mapping[str, np.ndarray]
+
+
+@dataclass
+class BatchAssessment:
+    """Column-oriented risk assessment for a batch of invoices"""
+    grade_index: np.ndarray  # index into `grades`
+    probability_of_default: np.ndarray
+    valuation: np.ndarray
+    confidence: np.ndarray
+    quantum_score: np.ndarray
+    z_score: np.ndarray
+    distance_to_default: np.ndarray
+
+    # Component scores
+    credit_risk_score: np.ndarray
+    liquidity_risk_score: np.ndarray
+    market_risk_score: np.ndarray
+    operational_risk_score: np.ndarray
+
+    # Grade lookup table for `grade_index`
+    grades: Tuple[RiskGrade, ...] = tuple(PD_THRESHOLDS)
+
+    def __len__(self) -> int:
+        return len(self.probability_of_default)
+
+    @property
+    def risk_grades(self) -> List[RiskGrade]:
+        """Risk grade per invoice."""
+        return [self.grades[i] for i in self.grade_index]
+
+
+# ============================================================================
+# FEATURE COLUMNS
+# ============================================================================
+
+def features_to_columns(features: Sequence[InvoiceFeatures]) -> Dict[str, np.ndarray]:
+    """Gather the scoring fields of many InvoiceFeatures into arrays."""
+    return {
+        name: np.fromiter((getattr(f, name) for f in features), dtype=dtype, count=len(features))
+        for name, dtype in SCORING_COLUMNS.items()
+    }
+
+
+# ============================================================================
+# SCORING KERNELS
+# ============================================================================
+
+def modified_zscore(cols: Columns, params: ModelParams = DEFAULT_PARAMS) -> np.ndarray:
+    """Modified Altman Z-Score for every invoice."""
+    amount = cols['amount']
+    completeness = cols['completeness_score']
+    formality = cols['formality_score']
+
+    amount_normalized = np.where(amount > 0, np.minimum(1.0, amount / 50000), 0.3)
+    wc_proxy = np.maximum(0, 1 - (cols['payment_terms_days'] / 90))
+    re_proxy = completeness * 0.7 + formality * 0.3
+    ebit_proxy = 0.5 + (amount_normalized * 0.5)
+    mve_proxy = completeness
+    sales_proxy = np.minimum(1.0, formality * 0.6 + (cols['text_length'] / 1000) * 0.4)
+
+    coefficients = params.altman_coefficients
+    return (
+        coefficients['working_capital_ta'] * wc_proxy +
+        coefficients['retained_earnings_ta'] * re_proxy +
+        coefficients['ebit_ta'] * ebit_proxy +
+        coefficients['market_value_equity_tl'] * mve_proxy +
+        coefficients['sales_ta'] * sales_proxy
+    )
+
+
+def distance_to_default(
+    cols: Columns,
+    params: ModelParams = DEFAULT_PARAMS,
+    volatility: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Merton-style Distance-to-Default for every invoice.
+
+    `volatility` replaces the completeness-based sigma (for sweeps).
+    """
+    amount = cols['amount']
+    V = np.where(amount > 0, amount, 5000)
+    D = params.default_threshold
+    if volatility is None:
+        sigma = np.maximum(params.min_volatility, 0.5 - (cols['completeness_score'] * 0.3))
+    else:
+        sigma = volatility
+    T = np.maximum(0.01, cols['payment_terms_days'] / 365)
+    r = params.risk_free_rate
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = (np.log(V / D) + (r - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    return np.where(V > D, dd, -1.0)
+
+
+def lateness(cols: Columns, params: ModelParams = DEFAULT_PARAMS) -> np.ndarray:
+    """Days past due as a fraction of max_overdue_days, 0 to 1, for every invoice."""
+    overdue = np.maximum(0, cols['age_days'] - cols['payment_terms_days'])
+    return np.minimum(1.0, overdue / params.max_overdue_days)
+
+
+def feature_signals(
+    cols: Columns,
+    params: ModelParams = DEFAULT_PARAMS,
+    industry_risk: Union[float, np.ndarray] = 1.0
+) -> Dict[str, np.ndarray]:
+    """Feature score inputs (one per FEATURE_WEIGHTS entry) for every invoice."""
+    amount = cols['amount']
+    terms = cols['payment_terms_days']
+    return {
+        'amount_normalized': np.where(amount > 0, np.minimum(1.0, amount / 50000), 0.3),
+        'payment_terms_score': np.maximum(0, 1 - (terms / 90)),
+        'document_completeness': cols['completeness_score'],
+        'text_quality': np.minimum(1.0, cols['text_length'] / 1000),
+        'entity_strength': (
+            cols['has_tax_id'].astype(np.float64) + cols['has_address'] + cols['has_bank_details']
+        ) / 3,
+        'temporal_validity': 1 - lateness(cols, params),
+        'format_professionalism': cols['formality_score'],
+        'industry_risk_factor': np.zeros_like(amount) + industry_risk,
+    }
+
+
+def feature_score(
+    cols: Columns,
+    params: ModelParams = DEFAULT_PARAMS,
+    industry_risk: Union[float, np.ndarray] = 1.0,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> np.ndarray:
+    """Weighted sum of the feature signals (default weights: FEATURE_WEIGHTS)."""
+    signals = feature_signals(cols, params, industry_risk)
+    weights = feature_weights if feature_weights is not None else FEATURE_WEIGHTS
+    score = 0.0
+    for name, weight in weights.items():
+        score = score + weight * signals[name]
+    return score
+
+
+def probability_of_default(
+    z_score: np.ndarray,
+    dd: np.ndarray,
+    params: ModelParams = DEFAULT_PARAMS,
+    industry_risk: Union[float, np.ndarray] = 1.0,
+    score: Union[float, np.ndarray] = 0.0,
+    late: Union[float, np.ndarray] = 0.0
+) -> np.ndarray:
+    """
+    Blend the Z-Score and DD default probabilities, scaled by industry risk,
+    with the overdue penalty for `late` (see `lateness`) and the logistic PD
+    of the feature score.
+    """
+    bands = params.z_pd_bands
+    z_pd = np.select(
+        [z_score > bound for bound, _ in bands],
+        [band_pd for _, band_pd in bands],
+        default=params.z_pd_base + (bands[-1][0] - z_score) * params.z_pd_slope,
+    )
+    with np.errstate(over='ignore'):
+        dd_pd = 1 / (1 + np.exp(dd * params.dd_pd_slope))
+    pd = (params.z_score_weight * z_pd + params.dd_weight * dd_pd) * industry_risk
+    pd = pd + params.overdue_pd_penalty * late
+    logit = params.score_pd_intercept + params.score_pd_slope * score
+    pd = pd + params.score_weight * (0.5 + 0.5 * np.tanh(logit / 2))
+    return np.clip(pd, 0.01, 0.99)
+
+
+def quantum_score(
+    cols: Columns,
+    z_score: np.ndarray,
+    pd: np.ndarray
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Quantum Score and its four component scores for every invoice."""
+    completeness = cols['completeness_score']
+
+    credit_score = (1 - pd) * 100
+    liquidity_score = (
+        np.minimum(1.0, cols['amount'] / 20000) +
+        np.maximum(0, 1 - cols['payment_terms_days'] / 120) +
+        (cols['has_bank_details'] * 0.3 + 0.7)
+    ) / 3 * 100
+    market_score = (
+        completeness +
+        cols['formality_score'] +
+        np.minimum(1.0, z_score / 4)
+    ) / 3 * 100
+    operational_score = (
+        completeness +
+        np.maximum(0, cols['sentiment_score']) +
+        np.minimum(1.0, cols['text_length'] / 500) +
+        (cols['has_tax_id'] * 0.2 + cols['has_address'] * 0.2 + 0.6)
+    ) / 4 * 100
+
+    quantum = (
+        credit_score * 0.30 +
+        liquidity_score * 0.25 +
+        market_score * 0.25 +
+        operational_score * 0.20
+    )
+    component_scores = {
+        'credit_risk': credit_score,
+        'liquidity_risk': liquidity_score,
+        'market_risk': market_score,
+        'operational_risk': operational_score,
+    }
+    return quantum, component_scores
+
+
+def grade_index(pd: np.ndarray, params: ModelParams = DEFAULT_PARAMS) -> np.ndarray:
+    """
+    Position of each PD's grade in `params.pd_thresholds`.
+
+    A binary search over the upper band edges; PDs past the last band map
+    to the last grade (F), as in FlowAICore.pd_to_grade.
+    """
+    upper_edges = np.array([high for _, high in params.pd_thresholds.values()])
+    index = np.searchsorted(upper_edges, pd, side='right')
+    return np.minimum(index, len(upper_edges) - 1).astype(np.int8)
+
+
+def confidence(cols: Columns, pd: np.ndarray) -> np.ndarray:
+    """Bayesian confidence estimate for every invoice."""
+    data_confidence = cols['completeness_score'] * 0.4 + 0.6
+    text_confidence = np.minimum(1.0, cols['text_length'] / 800)
+    model_certainty = 0.5 + (1 - 2 * np.abs(pd - 0.5)) * 0.5
+
+    conf = (
+        data_confidence * 0.4 +
+        text_confidence * 0.3 +
+        model_certainty * 0.3
+    )
+    return np.clip(conf, 0.50, 0.99)
+
+
+def valuation(cols: Columns, pd: np.ndarray) -> np.ndarray:
+    """Factoring valuation (truncated to whole units) for every invoice."""
+    amount = cols['amount']
+    base_amount = np.where(amount <= 0, 5000 + cols['completeness_score'] * 10000, amount)
+    advance_rate = 0.95 - (pd * 0.15)
+    risk_discount = pd * 0.05
+    return np.trunc(base_amount * advance_rate * (1 - risk_discount)).astype(np.int64)
+
+
+def score_columns(
+    cols: Columns,
+    params: ModelParams = DEFAULT_PARAMS,
+    volatility: Optional[np.ndarray] = None,
+    industry_risk: Union[float, np.ndarray] = 1.0,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> BatchAssessment:
+    """Run the full scoring pipeline over feature columns."""
+    z_score = modified_zscore(cols, params)
+    dd = distance_to_default(cols, params, volatility)
+    score = feature_score(cols, params, industry_risk, feature_weights)
+    pd = probability_of_default(z_score, dd, params, industry_risk, score, lateness(cols, params))
+    quantum, component_scores = quantum_score(cols, z_score, pd)
+
+    return BatchAssessment(
+        grade_index=grade_index(pd, params),
+        probability_of_default=pd,
+        valuation=valuation(cols, pd),
+        confidence=confidence(cols, pd),
+        quantum_score=quantum,
+        z_score=z_score,
+        distance_to_default=dd,
+        credit_risk_score=component_scores['credit_risk'],
+        liquidity_risk_score=component_scores['liquidity_risk'],
+        market_risk_score=component_scores['market_risk'],
+        operational_risk_score=component_scores['operational_risk'],
+        grades=tuple(params.pd_thresholds),
+    )
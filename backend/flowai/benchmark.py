@@ -0,0 +1,205 @@
+"""
+FlowAI Core Benchmarks
+Measured latency and throughput of the FlowAI Core pipeline
+
+Times `analyze`, each of its ten steps and batch scoring over synthetic
+invoices (corpus.py) from 1 KB to 5 MB, and writes a JSON report. `get_model_info`
+reports the numbers from the last run.
+
+    python -m flowai.benchmark                  # full suite
+    python -m flowai.benchmark --quick          # 1 KB - 100 KB, shorter budget
+    python -m flowai.benchmark --sizes 1KB,2MB --output /tmp/report.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .core import FlowAICore
+from .corpus import CORPUS_VERSION, InvoiceGenerator
+
+DEFAULT_REPORT_PATH = Path(__file__).parent / 'benchmark_report.json'
+
+DEFAULT_SIZES = (1 << 10, 10 << 10, 100 << 10, 1 << 20, 5 << 20)
+QUICK_SIZES = (1 << 10, 10 << 10, 100 << 10)
+
+# Timing budget per document size, and bounds on the number of timed runs
+BUDGET_SECONDS = 5.0
+MIN_RUNS = 5
+MAX_RUNS = 2000
+
+# Bytes of text scored per batch measurement
+BATCH_BYTES = 8 << 20
+
+PERCENTILES = (50, 90, 99)
+
+
+# ============================================================================
+# SIZES
+# ============================================================================
+
+def parse_size(value: str) -> int:
+    """Parse '512', '10KB' or '5MB' into bytes."""
+    value = value.strip().upper()
+    for suffix, factor in (('MB', 1 << 20), ('KB', 1 << 10), ('B', 1)):
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    if size >= 1 << 20 and size % (1 << 20) == 0:
+        return '%dMB' % (size >> 20)
+    if size >= 1 << 10 and size % (1 << 10) == 0:
+        return '%dKB' % (size >> 10)
+    return '%dB' % size
+
+
+# ============================================================================
+# TIMING
+# ============================================================================
+
+def _summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    samples = np.asarray(samples_ms)
+    summary = {'p%d' % q: float(np.percentile(samples, q)) for q in PERCENTILES}
+    summary.update(mean=float(samples.mean()), min=float(samples.min()), max=float(samples.max()))
+    return summary
+
+
+def _repeat(run: Callable[[int], None], budget: float) -> int:
+    """Call run(i) until the budget is spent (within MIN_RUNS..MAX_RUNS)."""
+    deadline = time.perf_counter() + budget
+    runs = 0
+    while runs < MAX_RUNS and (runs < MIN_RUNS or time.perf_counter() < deadline):
+        run(runs)
+        runs += 1
+    return runs
+
+
+def benchmark_size(core: FlowAICore, size: int, budget: float = BUDGET_SECONDS, seed: int = 0) -> Dict:
+    """Latency, per-step latency and batch throughput for one document size."""
+    documents = list(InvoiceGenerator(seed).documents(0, 8, size))
+    core.analyze(documents[0], explain=True)  # warm up pattern caches
+
+    analyze_ms: List[float] = []
+
+    def run_analyze(i: int) -> None:
+        t = time.perf_counter()
+        core.analyze(documents[i % len(documents)], explain=True)
+        analyze_ms.append((time.perf_counter() - t) * 1000)
+
+    step_ms: Dict[str, List[float]] = {}
+
+    def run_steps(i: int) -> None:
+        timings = core.analyze(documents[i % len(documents)], explain=True, timing=True).timings
+        for step, ms in timings.items():
+            step_ms.setdefault(step, []).append(ms)
+
+    runs = _repeat(run_analyze, budget / 2)
+    _repeat(run_steps, budget / 4)
+
+    # Batch: extraction plus vectorized scoring, then scoring alone
+    batch = [documents[i % len(documents)] for i in range(max(4, min(1000, BATCH_BYTES // size)))]
+    t = time.perf_counter()
+    features = [core.extract_features(text) for text in batch]
+    core.analyze_batch(features=features)
+    batch_seconds = time.perf_counter() - t
+    scoring = features * max(1, 100_000 // len(features))
+    t = time.perf_counter()
+    core.analyze_batch(features=scoring)
+    scoring_seconds = time.perf_counter() - t
+
+    return {
+        'size': format_size(size),
+        'size_bytes': size,
+        'runs': runs,
+        'analyze_ms': _summarize(analyze_ms),
+        'steps_ms': {step: _summarize(samples) for step, samples in step_ms.items()},
+        'batch': {
+            'documents': len(batch),
+            'documents_per_second': len(batch) / batch_seconds,
+            'megabytes_per_second': len(batch) * size / batch_seconds / (1 << 20),
+            'scoring_documents_per_second': len(scoring) / scoring_seconds,
+        },
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    budget: float = BUDGET_SECONDS,
+    core: Optional[FlowAICore] = None,
+    log: Optional[Callable[[str], None]] = None
+) -> Dict:
+    """Benchmark every size and return the report."""
+    core = core if core is not None else FlowAICore()
+    results = []
+    for size in sizes:
+        result = benchmark_size(core, size, budget)
+        results.append(result)
+        if log is not None:
+            latency = result['analyze_ms']
+            log('%6s  analyze p50 %9.3f ms  p99 %9.3f ms  batch %10.1f docs/s' % (
+                result['size'], latency['p50'], latency['p99'],
+                result['batch']['documents_per_second']))
+    return {
+        'model': 'FlowAI Core',
+        'version': core.VERSION,
+        'corpus': CORPUS_VERSION,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def write_report(report: Dict, path: Path = DEFAULT_REPORT_PATH) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: Path = DEFAULT_REPORT_PATH) -> Optional[Dict]:
+    """The last benchmark report, or None if there is none."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark FlowAI Core')
+    parser.add_argument('--sizes', help='comma-separated document sizes, e.g. 1KB,100KB,5MB')
+    parser.add_argument('--budget', type=float, default=BUDGET_SECONDS,
+                        help='seconds of timing per size (default: %(default)s)')
+    parser.add_argument('--quick', action='store_true', help='small sizes and a 1 s budget')
+    parser.add_argument('--output', type=Path, default=DEFAULT_REPORT_PATH,
+                        help='report path (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.sizes:
+        sizes = [parse_size(size) for size in args.sizes.split(',')]
+    else:
+        sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    budget = 1.0 if args.quick else args.budget
+
+    report = run_benchmarks(sizes, budget, log=print)
+    write_report(report, args.output)
+    print('Report written to %s' % args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+FlowAI Result Cache
+Content-addressed LRU/TTL cache for FlowAI Core assessments
+
+Entries are keyed by a BLAKE2b digest of the (normalized) document text
+together with the model version, so re-uploads of the same invoice skip
+feature extraction entirely and a model change never serves stale results.
+"""
+
+import hashlib
+import mmap
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+# UTF-8 text held in a byte buffer
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace and trim the ends.
+
+    Opt-in normalizer for callers that want PDF re-extractions differing
+    only in spacing to share an entry. Note that FlowAI Core reads the text
+    length, so such documents can score slightly differently when analyzed
+    fresh.
+    """
+    return " ".join(text.split())
+
+
+class ResultCache:
+    """
+    Bounded, thread-safe LRU cache with optional per-entry TTL.
+
+    Counts hits, misses, evictions (LRU capacity) and expirations (TTL).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        normalize: Optional[Callable[[str], str]] = None
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.normalize = normalize
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key_for(self, text: Union[str, Buffer], version: str) -> Tuple[str, str]:
+        """
+        Content address of `text` under model `version`.
+
+        UTF-8 text in a byte buffer is hashed in place (decoded only for a
+        normalizer) and gets the same address as the equal str.
+        """
+        if self.normalize is not None:
+            if not isinstance(text, str):
+                text = str(text, "utf-8", "replace")
+            text = self.normalize(text)
+        data = text.encode("utf-8", "surrogatepass") if isinstance(text, str) else text
+        digest = hashlib.blake2b(data, digest_size=16)
+        return version, digest.hexdigest()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store `value`, evicting the least recently used entry if full."""
+        expires_at = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
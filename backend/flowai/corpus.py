@@ -0,0 +1,444 @@
+"""
+FlowAI Synthetic Corpus
+Deterministic invoice texts (and PDFs) for load and scale testing
+
+Every document is a pure function of (seed, index), so corpora of any size
+are reproducible, can be regenerated in parallel, and documents can be
+re-created individually. Each document draws a quality level that decides
+which sections it carries (address, tax ID, bank details, contact, dates,
+terms, total), so the corpus spans every risk grade the model can reach.
+Amounts, currencies, payment terms, formats, lengths and lexicon keywords
+vary so every InvoiceFeatures field and scoring branch is exercised.
+
+    python -m flowai.corpus corpus/ --count 1000000 --seed 7 --workers 8
+    python -m flowai.corpus corpus/ --count 1000 --pdf
+
+    for text in read_corpus('corpus/'):
+        ...
+
+Texts are written as JSON Lines shards ({"id": ..., "text": ...}) plus a
+manifest.json; PDFs (optional) go to pdf/<index // 1000>/<index>.pdf.
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from .lexicon import Lexicon
+
+# Bump when the generated documents change for a given (seed, index)
+CORPUS_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_SHARD_SIZE = 100_000
+PDF_DIR_SIZE = 1000
+
+# Document length range in characters (log-uniform when not fixed)
+MIN_CHARS = 150
+MAX_CHARS = 20_000
+
+# Total amount range (log-uniform)
+MIN_AMOUNT = 10.0
+MAX_AMOUNT = 5_000_000.0
+
+
+# ============================================================================
+# VOCABULARY
+# ============================================================================
+
+_TITLES = ('INVOICE', 'Invoice', 'TAX INVOICE', 'Commercial Invoice', 'Statement', 'Bill', 'Receipt')
+_NAMES = ('Acme', 'Northwind', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli',
+          'Vandelay', 'Soylent', 'Cyberdyne', 'Tyrell', 'Wonka', 'Gringotts', 'Oceanic')
+_SECTORS = ('Industries', 'Logistics', 'Software', 'Health', 'Manufacturing', 'Retail',
+            'Construction', 'Hospitality', 'Consulting', 'Foods', 'Systems', 'Partners')
+_SUFFIXES = ('Inc.', 'LLC', 'Ltd.', 'Corp.', 'Corporation', 'Company', 'Co.', 'GmbH', 'S.A.', '')
+_STREETS = ('Market', 'Main', 'Oak', 'Harbor', 'Elm', 'King', 'Mill', 'Station', 'Park', 'Lake')
+_STREET_TYPES = ('Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Boulevard', 'Blvd')
+_CITIES = ('Springfield, IL 62701', 'London EC1A 1BB', 'Berlin 10115', 'Paris 75001',
+           'Austin, TX 73301', 'Toronto, ON M5H 2N2')
+# Addresses the address rule does not recognise
+_OTHER_ADDRESSES = ('PO Box %d', 'Postfach %d', 'Unit %d, Riverside Industrial Estate')
+# Case-folding hazards route extraction through the multi-pass fallback
+_HAZARD_ADDRESSES = ('İstiklal Caddesi %d, İstanbul', 'Straſſe %d, Hamburg')
+_ITEMS = ('Consulting services', 'Cloud hosting', 'Hardware maintenance', 'Software license',
+          'Freight and handling', 'Design work', 'Office supplies', 'Catering', 'Site survey',
+          'Legal review', 'Training session', 'Equipment rental', 'Data migration')
+_ITEM_LABELS = tuple('%-24s' % item for item in _ITEMS)
+_MONTHS = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+           'September', 'October', 'November', 'December')
+
+# Currency marks: recognised symbols and codes, and codes the model ignores
+_CURRENCIES = ('$', '€', '£', 'USD', 'EUR', 'GBP', 'CHF', 'JPY')
+_TERM_DAYS = (0, 7, 10, 15, 30, 30, 30, 45, 60, 60, 90, 120, 180)
+_TONES = ('positive', 'negative', 'mixed', 'neutral')
+
+
+# ============================================================================
+# GENERATOR
+# ============================================================================
+
+class InvoiceGenerator:
+    """
+    Seeded invoice text generator.
+
+    Sentiment and formality keywords are drawn from the lexicon, so a
+    custom lexicon is exercised as well as the bundled one.
+    """
+
+    def __init__(self, seed: int = 0, lexicon: Optional[Lexicon] = None):
+        self.seed = seed
+        self.lexicon = lexicon if lexicon is not None else Lexicon.load()
+
+    def document(self, index: int, size: Optional[int] = None) -> str:
+        """
+        Invoice `index` of this corpus.
+
+        Args:
+            index: Document number; the text depends only on (seed, index)
+            size: Approximate length in characters (default: drawn
+                log-uniformly from MIN_CHARS to MAX_CHARS)
+        """
+        rng = random.Random('%d:%d' % (self.seed, index))
+        if size is None:
+            size = int(math.exp(rng.uniform(math.log(MIN_CHARS), math.log(MAX_CHARS))))
+        # Each optional section is present with a probability set by quality
+        quality = rng.random()
+        present = 0.25 + 0.7 * quality
+
+        def has() -> bool:
+            return rng.random() < present
+
+        currency = rng.choice(_CURRENCIES) if has() else ''
+        symbol, code = (currency, '') if len(currency) == 1 else ('', currency)
+
+        lines = []
+        if rng.random() < 0.2:
+            lines.append('[LOGO]')
+        lines.append('%s #%s-%05d' % (rng.choice(_TITLES), rng.choice('ABINX'), rng.randint(0, 99999)))
+        lines.append(self._company(rng))
+        lines.append(self._address(rng, has()))
+        if has():
+            lines.append('billing@%s.example.com' % rng.choice(_NAMES).lower())
+        if has():
+            lines.append('Phone: %s' % self._phone(rng))
+        if has():
+            lines.append(self._tax_id(rng))
+        if has():
+            lines.append('Invoice Date: %s' % self._date(rng))
+        lines.append('Bill To: %s' % self._company(rng))
+        if has():
+            lines.append(self._address(rng, True))
+        if has():
+            lines.append(self._terms(rng))
+        if has():
+            lines.append('Due Date: %s' % self._date(rng))
+
+        footer = []
+        if rng.random() < present + 0.05:
+            amount = math.exp(rng.uniform(math.log(MIN_AMOUNT), math.log(MAX_AMOUNT)))
+            footer.append('Total Amount Due: %s%s%s' % (
+                symbol, self._money(rng, amount), ' ' + code if code else ''))
+        if has():
+            footer.append(self._bank(rng))
+        notes = self._notes(rng)
+        if notes:
+            footer.append(notes)
+
+        length = sum(len(line) + 1 for line in lines + footer)
+        while length < size:
+            line = self._line_item(rng, symbol)
+            lines.append(line)
+            length += len(line) + 1
+        return '\n'.join(lines + footer)
+
+    def documents(self, start: int = 0, stop: Optional[int] = None, size: Optional[int] = None) -> Iterator[str]:
+        """Invoices start, start + 1, ... (endless without stop)."""
+        index = start
+        while stop is None or index < stop:
+            yield self.document(index, size)
+            index += 1
+
+    # ------------------------------------------------------------------
+    # Sections
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _company(rng: random.Random) -> str:
+        suffix = rng.choice(_SUFFIXES)
+        name = '%s %s' % (rng.choice(_NAMES), rng.choice(_SECTORS))
+        return '%s %s' % (name, suffix) if suffix else name
+
+    @staticmethod
+    def _address(rng: random.Random, street: bool) -> str:
+        number = rng.randint(1, 9999)
+        if rng.random() < 0.01:
+            return rng.choice(_HAZARD_ADDRESSES) % number
+        if not street:
+            return rng.choice(_OTHER_ADDRESSES) % number
+        return '%d %s %s, %s' % (number, rng.choice(_STREETS), rng.choice(_STREET_TYPES), rng.choice(_CITIES))
+
+    @staticmethod
+    def _phone(rng: random.Random) -> str:
+        a, b, c = rng.randint(200, 999), rng.randint(200, 999), rng.randint(0, 9999)
+        return rng.choice(('(%d) %d-%04d', '%d.%d.%04d', '+1 %d %d %04d', '+44 %d %d %04d')) % (a, b, c)
+
+    @staticmethod
+    def _tax_id(rng: random.Random) -> str:
+        digits = rng.randint(0, 9999999)
+        return rng.choice((
+            'Tax ID: %02d-%07d' % (rng.randint(10, 99), digits),
+            'EIN: %02d-%07d' % (rng.randint(10, 99), digits),
+            'VAT: GB%09d' % digits,
+            'VAT Reg. DE%09d' % digits,
+        ))
+
+    @staticmethod
+    def _date(rng: random.Random) -> str:
+        year, month, day = rng.randint(2019, 2026), rng.randint(1, 12), rng.randint(1, 28)
+        return rng.choice((
+            '%02d/%02d/%d' % (month, day, year),
+            '%d-%02d-%02d' % (year, month, day),
+            '%02d-%02d-%02d' % (day, month, year % 100),
+            '%s %d, %d' % (_MONTHS[month - 1], day, year),
+        ))
+
+    @staticmethod
+    def _terms(rng: random.Random) -> str:
+        days = rng.choice(_TERM_DAYS)
+        if days == 0:
+            return 'Terms: due on receipt'
+        return rng.choice(('Payment Terms: Net %d', 'Net %d days', 'Payment terms: %d days', 'NET %d')) % days
+
+    @staticmethod
+    def _money(rng: random.Random, amount: float) -> str:
+        if rng.random() < 0.3:
+            return '%d' % amount
+        return format(amount, ',.2f' if rng.random() < 0.7 else '.2f')
+
+    @staticmethod
+    def _line_item(rng: random.Random, symbol: str) -> str:
+        # Line items dominate long documents: one draw per line, split up
+        bits = rng.getrandbits(48)
+        bits, item = divmod(bits, len(_ITEM_LABELS))
+        bits, quantity = divmod(bits, 40)
+        cents = 500 + bits % 250_000
+        return '%s %3d x %s%s' % (_ITEM_LABELS[item], quantity + 1, symbol, format(cents / 100, ',.2f'))
+
+    def _bank(self, rng: random.Random) -> str:
+        if rng.random() < 0.5:
+            return 'Bank: First National, Account %09d, Routing %09d' % (
+                rng.randint(0, 10 ** 9 - 1), rng.randint(0, 10 ** 9 - 1))
+        return 'IBAN: DE%02d %04d %04d %04d %04d %02d  SWIFT: FNBKDEFF' % tuple(
+            rng.randint(0, 10 ** width - 1) for width in (2, 4, 4, 4, 4, 2))
+
+    def _notes(self, rng: random.Random) -> str:
+        """Lexicon keywords for the document's tone."""
+        tone = rng.choice(_TONES)
+        words = []
+        if tone in ('positive', 'mixed') and self.lexicon.positive:
+            words += rng.sample(self.lexicon.positive, rng.randint(1, min(3, len(self.lexicon.positive))))
+        if tone in ('negative', 'mixed') and self.lexicon.negative:
+            words += rng.sample(self.lexicon.negative, rng.randint(1, min(3, len(self.lexicon.negative))))
+        if self.lexicon.professional and rng.random() < 0.5:
+            words += rng.sample(self.lexicon.professional, rng.randint(1, min(4, len(self.lexicon.professional))))
+        return 'Notes: %s' % ', '.join(words).capitalize() if words else ''
+
+
+# ============================================================================
+# PDF
+# ============================================================================
+
+_PDF_LINES_PER_PAGE = 60
+
+
+def _pdf_escape(line: str) -> bytes:
+    data = line.encode('latin-1', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def render_pdf(text: str) -> bytes:
+    """
+    A minimal text PDF (Letter, Helvetica 10pt), one text line per line.
+
+    Characters outside Latin-1 are written as '?'.
+    """
+    lines = text.split('\n')
+    pages = [lines[i:i + _PDF_LINES_PER_PAGE] for i in range(0, len(lines), _PDF_LINES_PER_PAGE)] or [[]]
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, contents) pairs
+    kids = ' '.join('%d 0 R' % (4 + 2 * i) for i in range(len(pages)))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + kids.encode() + b'] /Count %d >>' % len(pages),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    for i, page in enumerate(pages):
+        stream = b'BT /F1 10 Tf 12 TL 50 750 Td\n' + b''.join(
+            b'(' + _pdf_escape(line) + b') Tj T*\n' for line in page) + b'ET'
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (5 + 2 * i))
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# ============================================================================
+# CORPUS FILES
+# ============================================================================
+
+def _shard_name(shard: int, compress: bool) -> str:
+    return 'shard-%05d.jsonl%s' % (shard, '.gz' if compress else '')
+
+
+def _write_shard(
+    root: str,
+    seed: int,
+    lexicon: Optional[Lexicon],
+    shard: int,
+    start: int,
+    stop: int,
+    size: Optional[int],
+    compress: bool,
+    pdf: bool
+) -> int:
+    """Generate documents [start, stop) into one shard; returns characters written."""
+    generator = InvoiceGenerator(seed, lexicon)
+    path = os.path.join(root, _shard_name(shard, compress))
+    opener = gzip.open if compress else open
+    chars = 0
+    with opener(path, 'wt', encoding='utf-8') as f:
+        batch: List[str] = []
+        for index in range(start, stop):
+            text = generator.document(index, size)
+            chars += len(text)
+            batch.append(json.dumps({'id': index, 'text': text}, ensure_ascii=False) + '\n')
+            if pdf:
+                directory = os.path.join(root, 'pdf', '%05d' % (index // PDF_DIR_SIZE))
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, '%08d.pdf' % index), 'wb') as out:
+                    out.write(render_pdf(text))
+            if len(batch) >= 1024:
+                f.writelines(batch)
+                batch.clear()
+        f.writelines(batch)
+    return chars
+
+
+def write_corpus(
+    path: Union[str, os.PathLike],
+    count: int,
+    seed: int = 0,
+    size: Optional[int] = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    workers: int = 1,
+    compress: bool = False,
+    pdf: bool = False,
+    lexicon: Optional[Lexicon] = None
+) -> Dict:
+    """
+    Write `count` invoices to `path` as JSON Lines shards and a manifest.
+
+    Shards are independent, so with workers > 1 each is generated and
+    written by its own process; output is identical for any worker count.
+
+    Args:
+        path: Output directory (created if missing)
+        count: Number of documents
+        seed: Corpus seed
+        size: Fixed approximate document length (default: varied)
+        shard_size: Documents per shard file
+        workers: Processes generating shards in parallel
+        compress: gzip the shards
+        pdf: Also render every document as a PDF
+        lexicon: Keyword source (default: bundled)
+
+    Returns:
+        The manifest
+    """
+    if count < 0:
+        raise ValueError("count must be non-negative")
+    if shard_size <= 0:
+        raise ValueError("shard_size must be positive")
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+
+    bounds = [(shard, start, min(start + shard_size, count))
+              for shard, start in enumerate(range(0, count, shard_size))]
+    args = [(str(root), seed, lexicon, shard, start, stop, size, compress, pdf)
+            for shard, start, stop in bounds]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chars = sum(pool.map(_write_shard, *zip(*args)))
+    else:
+        chars = sum(_write_shard(*a) for a in args)
+
+    manifest = {
+        'generator': CORPUS_VERSION,
+        'seed': seed,
+        'count': count,
+        'size': size,
+        'characters': chars,
+        'shard_size': shard_size,
+        'shards': [_shard_name(shard, compress) for shard, _, _ in bounds],
+        'pdf': pdf,
+        'lexicon': None if lexicon is None else asdict(lexicon),
+    }
+    with open(root / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_corpus(path: Union[str, os.PathLike]) -> Iterator[str]:
+    """Texts of a written corpus, in index order."""
+    root = Path(path)
+    with open(root / MANIFEST_NAME, encoding='utf-8') as f:
+        manifest = json.load(f)
+    for name in manifest['shards']:
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(root / name, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)['text']
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Write a synthetic invoice corpus')
+    parser.add_argument('output', type=Path, help='output directory')
+    parser.add_argument('--count', type=int, default=1000, help='documents (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='corpus seed (default: %(default)s)')
+    parser.add_argument('--size', type=int, help='fixed document length in characters')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help='documents per shard (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='generator processes (default: %(default)s)')
+    parser.add_argument('--gzip', action='store_true', help='compress shards')
+    parser.add_argument('--pdf', action='store_true', help='also write one PDF per document')
+    args = parser.parse_args(argv)
+
+    manifest = write_corpus(
+        args.output, args.count, seed=args.seed, size=args.size, shard_size=args.shard_size,
+        workers=args.workers, compress=args.gzip, pdf=args.pdf,
+    )
+    print('Wrote %d documents (%d characters) in %d shards to %s' % (
+        manifest['count'], manifest['characters'], len(manifest['shards']), args.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
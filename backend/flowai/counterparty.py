@@ -0,0 +1,288 @@
+"""
+FlowAI Counterparty Index
+Running statistics per invoice counterparty (vendor or client)
+
+Counterparty names are canonicalized (case, punctuation, spacing and a
+trailing legal form do not matter, so 'Acme Health Inc.' and 'ACME HEALTH'
+are one counterparty) and interned to dense ids. Statistics are numpy
+columns indexed by id, so recording an invoice and looking up a
+counterparty's history are both O(1) and need no database:
+
+    index = CounterpartyIndex()
+    index.record('Acme Health Inc.', 12000.0, RiskGrade.A)
+    index.lookup('ACME HEALTH')    # CounterpartyStats(name='acme health', invoices=1, ...)
+    index.save('counterparties.npz')
+
+FlowAICore keeps one (see FlowAICore.analyze), updated with the vendor and
+client of every analyzed invoice. `record_invoice` counts each document
+once, however often it is analyzed: its whitespace-normalized text's
+digest is remembered (the last SEEN_CAPACITY documents, saved with the
+index), so retries, cache expiry and re-uploads do not inflate the history.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .cache import normalize_whitespace
+from .core import RiskGrade, Text
+from .store import StringPool
+
+# Serialization format of index files: a JSON header (`__index__`), the
+# recorded document keys (`__seen__`) and one array per statistic
+INDEX_FORMAT = 1
+
+# Legal forms dropped from the end of a name (after removing dots)
+LEGAL_SUFFIXES = frozenset({
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'ag', 'sa', 'plc',
+})
+
+COUNTERPARTY_DTYPES: Dict[str, type] = {
+    'invoices': np.int64,
+    'total_amount': np.float64,
+    'last_grade': np.int8,  # index into GRADES, -1 before any graded invoice
+}
+
+GRADES = tuple(RiskGrade)
+_GRADE_CODES = {grade: code for code, grade in enumerate(GRADES)}
+
+# Document digests remembered by record_invoice
+SEEN_CAPACITY = 1 << 16
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def canonical_name(name: str) -> str:
+    """Key of a counterparty name ('' if it holds no letters or digits)."""
+    words = _SEPARATORS.sub(' ', name.casefold().replace('.', '')).split()
+    if len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def document_key(text: Text) -> int:
+    """64-bit BLAKE2b digest of a document's whitespace-normalized text."""
+    if not isinstance(text, str):
+        text = str(text, 'utf-8', 'replace')
+    digest = hashlib.blake2b(normalize_whitespace(text).encode('utf-8', 'surrogatepass'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+class DocumentKeyHasher:
+    """
+    Incremental `document_key` of a document fed piece by piece.
+
+    Whitespace runs spanning a break between pieces are collapsed, so the
+    key equals `document_key` of the concatenated text.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=8)
+        self._started = False  # a word has been hashed
+        self._in_word = False  # the last piece ended inside a word
+
+    def update(self, text: Text) -> None:
+        if not isinstance(text, str):
+            text = str(text, 'utf-8', 'replace')
+        words = text.split()
+        if words:
+            joined = ' '.join(words)
+            if self._started and not (self._in_word and not text[0].isspace()):
+                joined = ' ' + joined
+            self._hash.update(joined.encode('utf-8', 'surrogatepass'))
+            self._started = True
+        if text:
+            self._in_word = not text[-1].isspace()
+
+    def digest(self) -> int:
+        return int.from_bytes(self._hash.digest(), 'little')
+
+
+@dataclass
+class CounterpartyStats:
+    """History of one counterparty"""
+    name: str  # canonical
+    invoices: int
+    total_amount: float
+    last_grade: Optional[RiskGrade]
+
+    @property
+    def average_amount(self) -> float:
+        return self.total_amount / self.invoices if self.invoices else 0.0
+
+
+class CounterpartyIndex:
+    """
+    Interned counterparties with running invoice statistics.
+
+    Safe to share between threads.
+
+    Args:
+        capacity: Initial number of counterparty rows
+        seen_capacity: Documents remembered by `record_invoice`
+    """
+
+    def __init__(self, capacity: int = 1024, seen_capacity: int = SEEN_CAPACITY):
+        self.names = StringPool()
+        self.seen_capacity = seen_capacity
+        self._seen: 'OrderedDict[int, None]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(max(1, capacity), dtype=dtype)
+            for name, dtype in COUNTERPARTY_DTYPES.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one statistics column, indexed by id."""
+        return self._columns[name][:len(self.names)]
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Id of a known counterparty (None if unseen or empty)."""
+        key = canonical_name(name)
+        return self.names.find(key) if key else None
+
+    def _reserve(self, rows: int) -> None:
+        if rows > len(self._columns['invoices']):
+            capacity = max(rows, 2 * len(self._columns['invoices']))
+            for name, col in self._columns.items():
+                grown = np.zeros(capacity, dtype=col.dtype)
+                grown[:len(col)] = col
+                self._columns[name] = grown
+
+    # ------------------------------------------------------------------
+    # Updates and lookups
+    # ------------------------------------------------------------------
+
+    def record(self, name: str, amount: float = 0.0, grade: Optional[RiskGrade] = None) -> Optional[int]:
+        """
+        Count one invoice of `name`; returns its id.
+
+        A name without letters or digits is not recorded (returns None).
+        """
+        key = canonical_name(name)
+        if not key:
+            return None
+        with self._lock:
+            return self._count(key, amount, grade)
+
+    def record_invoice(
+        self,
+        document: int,
+        vendor: str,
+        client: str,
+        amount: float = 0.0,
+        grade: Optional[RiskGrade] = None
+    ) -> bool:
+        """
+        Count one invoice for its vendor and client, once per document.
+
+        Args:
+            document: The invoice's `document_key`
+            vendor: Vendor name ('' if unknown)
+            client: Client name ('' if unknown); a client that is also the
+                vendor is counted once
+
+        Returns:
+            False if the document was already counted (nothing changes)
+        """
+        keys = {canonical_name(vendor), canonical_name(client)} - {''}
+        with self._lock:
+            if document in self._seen:
+                self._seen.move_to_end(document)
+                return False
+            self._seen[document] = None
+            if len(self._seen) > self.seen_capacity:
+                self._seen.popitem(last=False)
+            for key in sorted(keys):
+                self._count(key, amount, grade)
+        return True
+
+    def _count(self, key: str, amount: float, grade: Optional[RiskGrade]) -> int:
+        """Add an invoice to canonical name `key`; the lock must be held."""
+        row = self.names.find(key)
+        if row is None:
+            self._reserve(len(self.names) + 1)
+            row = self.names.intern(key)
+            self._columns['last_grade'][row] = -1
+        cols = self._columns
+        cols['invoices'][row] += 1
+        cols['total_amount'][row] += amount
+        if grade is not None:
+            cols['last_grade'][row] = _GRADE_CODES[grade]
+        return row
+
+    def stats(self, row: int) -> CounterpartyStats:
+        """Statistics of the counterparty with id `row`."""
+        cols = self._columns
+        grade = int(cols['last_grade'][row])
+        return CounterpartyStats(
+            name=self.names.lookup(row),
+            invoices=int(cols['invoices'][row]),
+            total_amount=float(cols['total_amount'][row]),
+            last_grade=GRADES[grade] if grade >= 0 else None,
+        )
+
+    def lookup(self, name: str) -> Optional[CounterpartyStats]:
+        """Statistics of `name` (None if it was never recorded)."""
+        row = self.resolve(name)
+        return self.stats(row) if row is not None else None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """Write the index to an uncompressed .npz file, replaced atomically."""
+        with self._lock:
+            size = len(self.names)
+            header = json.dumps({
+                'format': INDEX_FORMAT,
+                'grades': [grade.value for grade in GRADES],
+                'names': [self.names.lookup(row) for row in range(size)],
+            })
+            path = os.fspath(path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f, __index__=np.array(header),
+                    __seen__=np.fromiter(self._seen, dtype=np.uint64, count=len(self._seen)),
+                    **{name: col[:size] for name, col in self._columns.items()}
+                )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'CounterpartyIndex':
+        """Read an index written by `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            header = json.loads(archive['__index__'].item())
+            if header.get('format') != INDEX_FORMAT:
+                raise ValueError(f"Unsupported counterparty index format: {header.get('format')!r}")
+            if header['grades'] != [grade.value for grade in GRADES]:
+                raise ValueError("Counterparty index was written with different risk grades")
+            names = header['names']
+            index = cls(capacity=len(names))
+            for name, dtype in COUNTERPARTY_DTYPES.items():
+                col = archive[name]
+                if len(col) != len(names):
+                    raise ValueError(f"Counterparty index column {name!r} has {len(col)} rows, expected {len(names)}")
+                index._columns[name][:len(names)] = col.astype(dtype, copy=False)
+            if '__seen__' not in archive.files:
+                raise ValueError("Counterparty index is missing its recorded document keys")
+            index._seen.update((int(key), None) for key in archive['__seen__'][-index.seen_capacity:])
+        for name in names:
+            index.names.intern(name)
+        return index
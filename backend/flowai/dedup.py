@@ -0,0 +1,413 @@
+"""
+FlowAI Near-Duplicate Index
+SimHash fingerprints and a sublinear Hamming-distance index over them
+
+Every document gets a 64-bit SimHash over its word shingles (runs of
+SHINGLE_WORDS lower-cased words, weighted by count). Re-submitted or lightly
+edited invoices share most shingles, so their fingerprints differ in only a
+few bits, while unrelated documents differ in about half of them.
+
+NearDuplicateIndex finds every stored fingerprint within `max_distance`
+bits of a query. The fingerprint is split into max_distance + 1 bit blocks;
+by pigeonhole, any fingerprint that close matches the query exactly on at
+least one block. Each block keeps its values sorted, so a query is one
+binary search per block followed by an exact check of the few candidates:
+
+    index = NearDuplicateIndex()
+    index.add('INV-1042', simhash(text))
+    index.query(simhash(edited_text))   # [('INV-1042', 2)]
+    index.save('duplicates.npz')
+
+A stored fingerprint costs 32 bytes (plus its key) at the default
+max_distance of 3.
+"""
+
+import codecs
+import json
+import os
+import threading
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .cache import Buffer
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+DEFAULT_MAX_DISTANCE = 3
+
+# Words past this length (in UTF-8 bytes) only count their first
+# MAX_WORD_BYTES, so a pathological "word" costs the same as any other
+MAX_WORD_BYTES = 64
+
+# Index snapshot layout version
+INDEX_FORMAT = 1
+
+# Unsorted rows a query checks exhaustively before they are merged into
+# the block tables
+_PENDING_ROWS = 4096
+
+# Text hashed per vectorized step
+_CHUNK_CHARS = 1 << 16
+
+# Word bytes: ASCII letters, digits and underscore, and every non-ASCII
+# byte (so words in any script hold together)
+_WORD_BYTES = np.zeros(256, dtype=np.bool_)
+_WORD_BYTES[[ord(ch) for ch in '0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ']] = True
+_WORD_BYTES[0x80:] = True
+
+# Words hash as polynomials in _BASE over their bytes (mod 2**64): a prefix
+# sum of byte * _BASE**i gives any word's hash from two lookups
+_BASE = 0x100000001B3
+_BASE_INVERSE = pow(_BASE, -1, 1 << 64)
+
+# Odd multipliers weighting a word by its position in the shingle
+_POSITION_WEIGHTS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64
+)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+Fingerprint = int
+
+
+def _powers(base: int, count: int) -> np.ndarray:
+    powers = np.empty(count, dtype=np.uint64)
+    powers[0] = 1
+    step = 1
+    # Doubling: powers[k:2k] = powers[:k] * base**k
+    while step < count:
+        span = min(step, count - step)
+        powers[step:step + span] = powers[:span] * np.uint64(pow(base, step, 1 << 64))
+        step *= 2
+    return powers
+
+
+# Byte positions one hashing step can span (a chunk of 4-byte characters
+# after a carried-over word)
+_POWERS = _powers(_BASE, 4 * _CHUNK_CHARS + MAX_WORD_BYTES + 1)
+_INVERSE_POWERS = _powers(_BASE_INVERSE, len(_POWERS))
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spread every input bit over the whole word."""
+    h = h ^ (h >> np.uint64(30))
+    h = h * _MIX_1
+    h = h ^ (h >> np.uint64(27))
+    h = h * _MIX_2
+    return h ^ (h >> np.uint64(31))
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    bits = np.unpackbits(values.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1)
+    return bits.sum(axis=1)
+
+
+def hamming(a: Fingerprint, b: Fingerprint) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count('1')
+
+
+class SimHasher:
+    """
+    Incremental SimHash of a document fed piece by piece.
+
+    Words and shingles spanning a break between pieces are handled, so the
+    fingerprint equals `simhash` of the concatenated text.
+    """
+
+    def __init__(self):
+        self._counts = np.zeros(FINGERPRINT_BITS, dtype=np.int64)
+        self._shingles = 0
+        # Start (at most MAX_WORD_BYTES) of a word cut off at the end of the
+        # last piece, and the hashes of the last SHINGLE_WORDS - 1 words
+        self._partial = b''
+        self._tail = np.empty(0, dtype=np.uint64)
+
+    def update(self, text: str) -> None:
+        """Add the next piece of the document."""
+        for start in range(0, len(text), _CHUNK_CHARS):
+            chunk = text[start:start + _CHUNK_CHARS].lower()
+            self._update(chunk.encode('utf-8', 'surrogatepass'))
+
+    def _update(self, data: bytes) -> None:
+        data = self._partial + data
+        # Word flags padded with a non-word byte at each end: words start
+        # and end where consecutive flags differ
+        is_word = np.zeros(len(data) + 2, dtype=np.bool_)
+        _WORD_BYTES.take(np.frombuffer(data, dtype=np.uint8), out=is_word[1:-1])
+        edges = np.flatnonzero(is_word[1:] != is_word[:-1])
+        starts, ends = edges[0::2], edges[1::2]
+        if len(starts) and ends[-1] == len(data):
+            # The last word may continue in the next piece
+            self._partial = data[starts[-1]:starts[-1] + MAX_WORD_BYTES]
+            starts, ends = starts[:-1], ends[:-1]
+        else:
+            self._partial = b''
+        self._add_words(self._hash_words(data, starts, ends))
+
+    @staticmethod
+    def _hash_words(data: bytes, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        ends = np.minimum(ends, starts + MAX_WORD_BYTES)
+        codes = np.frombuffer(data, dtype=np.uint8)
+        prefix = np.zeros(len(codes) + 1, dtype=np.uint64)
+        np.cumsum(codes * _POWERS[:len(codes)], out=prefix[1:])
+        words = (prefix[ends] - prefix[starts]) * _INVERSE_POWERS[starts]
+        return _mix(words + (ends - starts).astype(np.uint64))
+
+    def _add_words(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = np.concatenate((self._tail, hashes))
+        self._tail = hashes[-(SHINGLE_WORDS - 1):]
+        if len(hashes) >= SHINGLE_WORDS:
+            self._counts += self._bit_counts(hashes, SHINGLE_WORDS)
+            self._shingles += len(hashes) - SHINGLE_WORDS + 1
+
+    @staticmethod
+    def _bit_counts(hashes: np.ndarray, width: int) -> np.ndarray:
+        """How many shingles of `width` words over `hashes` set each bit."""
+        count = len(hashes) - width + 1
+        shingles = hashes[:count] * _POSITION_WEIGHTS[0]
+        for offset in range(1, width):
+            shingles += hashes[offset:offset + count] * _POSITION_WEIGHTS[offset]
+        bytes_ = _mix(shingles).astype('<u8').view(np.uint8).reshape(-1, 8)
+        bits = np.unpackbits(bytes_, axis=1, bitorder='little')
+        # Column sums as a matrix product, exact in float32 since one step
+        # has far fewer than 2**24 shingles
+        return (np.ones(count, dtype=np.float32) @ bits).astype(np.int64)
+
+    def digest(self) -> Fingerprint:
+        """Fingerprint of everything fed so far (the hasher stays usable)."""
+        counts, shingles, tail = self._counts, self._shingles, self._tail
+        if self._partial:
+            last = self._hash_words(self._partial, np.array([0]), np.array([len(self._partial)]))
+            tail = np.concatenate((tail, last))
+            if len(tail) == SHINGLE_WORDS:
+                # The cut-off word closes one more shingle
+                counts = counts + self._bit_counts(tail, SHINGLE_WORDS)
+                shingles += 1
+        if shingles == 0 and len(tail):
+            # Documents shorter than one shingle are a single shorter one
+            counts, shingles = self._bit_counts(tail, len(tail)), 1
+        if shingles == 0:
+            return 0
+        majority = np.packbits(2 * counts > shingles, bitorder='little')
+        return int(majority.view('<u8')[0])
+
+
+def simhash(text: Union[str, Buffer]) -> Fingerprint:
+    """
+    64-bit SimHash of a document's word shingles.
+
+    UTF-8 text in a byte buffer is decoded one chunk at a time, so it is
+    never copied whole.
+    """
+    hasher = SimHasher()
+    if isinstance(text, str):
+        hasher.update(text)
+        return hasher.digest()
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    with memoryview(text) as view:
+        for start in range(0, view.nbytes, _CHUNK_CHARS):
+            hasher.update(decoder.decode(view[start:start + _CHUNK_CHARS]))
+    hasher.update(decoder.decode(b'', final=True))
+    return hasher.digest()
+
+
+class NearDuplicateIndex:
+    """
+    Fingerprints keyed by document id, searchable by Hamming distance.
+
+    Fingerprints are appended to a growing column. Each of the
+    max_distance + 1 bit blocks keeps a sorted copy of its values with the
+    matching rows; rows added since the last merge (at most _PENDING_ROWS)
+    are checked exhaustively. Queries and additions are thread-safe.
+
+    Args:
+        max_distance: Largest Hamming distance queries may ask for
+        capacity: Initial number of fingerprint rows
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, capacity: int = 1024):
+        if not 0 <= max_distance < FINGERPRINT_BITS // 2:
+            raise ValueError(f"max_distance must be in [0, {FINGERPRINT_BITS // 2})")
+        self.max_distance = max_distance
+        self.keys: List[str] = []
+        self._key_set: Set[str] = set()
+        self._fingerprints = np.empty(max(1, capacity), dtype=np.uint64)
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # (shift, width) of each block, widths as even as possible
+        blocks = max_distance + 1
+        widths = [FINGERPRINT_BITS // blocks + (i < FINGERPRINT_BITS % blocks) for i in range(blocks)]
+        self._blocks = [(sum(widths[:i]), width) for i, width in enumerate(widths)]
+        self._block_dtype = np.min_scalar_type((1 << max(widths)) - 1)
+
+        # Per block: sorted values and their rows, covering rows [0, _merged)
+        self._values = [np.empty(0, dtype=self._block_dtype) for _ in self._blocks]
+        self._rows = [np.empty(0, dtype=np.uint32) for _ in self._blocks]
+        self._merged = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._key_set
+
+    @property
+    def fingerprints(self) -> np.ndarray:
+        """Zero-copy view of the stored fingerprints, in insertion order."""
+        return self._fingerprints[:self._size]
+
+    def _block(self, fingerprints: np.ndarray, shift: int, width: int) -> np.ndarray:
+        mask = np.uint64((1 << width) - 1)
+        return ((fingerprints >> np.uint64(shift)) & mask).astype(self._block_dtype)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add(self, key: str, fingerprint: Fingerprint) -> int:
+        """Store one fingerprint; returns its row."""
+        return self.extend([key], [fingerprint])
+
+    def extend(self, keys: Iterable[str], fingerprints: Iterable[Fingerprint]) -> int:
+        """Store many fingerprints; returns the row of the first."""
+        keys = [str(key) for key in keys]
+        values = np.fromiter(fingerprints, dtype=np.uint64, count=len(keys))
+        with self._lock:
+            return self._append(keys, values)
+
+    def add_new(self, key: str, fingerprint: Fingerprint) -> bool:
+        """Store one fingerprint unless `key` is already stored; returns whether it was."""
+        key = str(key)
+        with self._lock:
+            if key in self._key_set:
+                return False
+            self._append([key], np.array([fingerprint], dtype=np.uint64))
+        return True
+
+    def _append(self, keys: List[str], values: np.ndarray) -> int:
+        """Store rows; called with the lock held."""
+        start, stop = self._size, self._size + len(keys)
+        if stop > np.iinfo(np.uint32).max:
+            raise ValueError("NearDuplicateIndex is full")
+        if stop > len(self._fingerprints):
+            grown = np.empty(max(stop, 2 * len(self._fingerprints)), dtype=np.uint64)
+            grown[:start] = self._fingerprints[:start]
+            self._fingerprints = grown
+        self._fingerprints[start:stop] = values
+        self.keys.extend(keys)
+        self._key_set.update(keys)
+        self._size = stop
+        if stop - self._merged > _PENDING_ROWS:
+            self._merge()
+        return start
+
+    def _merge(self) -> None:
+        """Fold the pending rows into the sorted block tables."""
+        rows = np.arange(self._merged, self._size, dtype=np.uint32)
+        pending = self._fingerprints[self._merged:self._size]
+        for i, (shift, width) in enumerate(self._blocks):
+            values = self._block(pending, shift, width)
+            order = np.argsort(values, kind='stable')
+            values, new_rows = values[order], rows[order]
+            # Insert after equal values, so each bucket stays in row order
+            at = np.searchsorted(self._values[i], values, side='right')
+            self._values[i] = np.insert(self._values[i], at, values)
+            self._rows[i] = np.insert(self._rows[i], at, new_rows)
+        self._merged = self._size
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        fingerprint: Fingerprint,
+        max_distance: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Stored documents within `max_distance` bits of `fingerprint`.
+
+        Args:
+            fingerprint: Query fingerprint (see `simhash`)
+            max_distance: Largest distance to report (default and maximum:
+                the index's max_distance)
+            limit: Report at most this many matches
+
+        Returns:
+            (key, distance) pairs, nearest first, then oldest first
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        elif not 0 <= max_distance <= self.max_distance:
+            raise ValueError(f"max_distance must be in [0, {self.max_distance}]")
+        query = np.uint64(fingerprint)
+        block_type = self._block_dtype.type
+        with self._lock:
+            candidates = []
+            for (shift, width), values, rows in zip(self._blocks, self._values, self._rows):
+                # Typed like the table, or searchsorted converts the whole table
+                value = block_type((fingerprint >> shift) & ((1 << width) - 1))
+                candidates.append(rows[values.searchsorted(value, 'left'):values.searchsorted(value, 'right')])
+            # Pending rows follow every merged row, so the result stays sorted
+            rows = np.concatenate((
+                np.unique(np.concatenate(candidates)),
+                np.arange(self._merged, self._size, dtype=np.uint32),
+            ))
+            distances = _popcount(self._fingerprints[rows] ^ query)
+            keys = self.keys
+        close = distances <= max_distance
+        rows, distances = rows[close], distances[close]
+        order = np.lexsort((rows, distances))[:limit]
+        return [(keys[row], int(distance)) for row, distance in zip(rows[order], distances[order])]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Write the index to an uncompressed .npz file.
+
+        The block tables are saved too, so loading needs no re-sort. The
+        file is replaced atomically.
+        """
+        with self._lock:
+            self._merge()
+            header = json.dumps({'format': INDEX_FORMAT, 'max_distance': self.max_distance, 'keys': self.keys})
+            arrays = {'fingerprints': self.fingerprints}
+            for i in range(len(self._blocks)):
+                arrays[f'values{i}'] = self._values[i]
+                arrays[f'rows{i}'] = self._rows[i]
+            path = os.fspath(path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, __index__=np.array(header), **arrays)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'NearDuplicateIndex':
+        """Read an index written by `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            header = json.loads(archive['__index__'].item())
+            if header.get('format') != INDEX_FORMAT:
+                raise ValueError(f"Unsupported duplicate index format: {header.get('format')!r}")
+            fingerprints = archive['fingerprints']
+            index = cls(max_distance=header['max_distance'], capacity=len(fingerprints))
+            if len(header['keys']) != len(fingerprints):
+                raise ValueError("Duplicate index keys and fingerprints differ in length")
+            for i in range(len(index._blocks)):
+                index._values[i] = archive[f'values{i}'].astype(index._block_dtype, copy=False)
+                index._rows[i] = archive[f'rows{i}'].astype(np.uint32, copy=False)
+        index._fingerprints[:len(fingerprints)] = fingerprints
+        index.keys = header['keys']
+        index._key_set = set(index.keys)
+        index._size = index._merged = len(fingerprints)
+        return index
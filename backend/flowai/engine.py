@@ -10,6 +10,7 @@ Architecture:
 """
 
 import os
+import datetime
 import json
 import asyncio
 import logging
@@ -20,10 +21,13 @@ from enum import Enum
 import httpx
 
 from .models import ModelRegistry, ModelCapability, AIModel
-from .core import FlowAICore, get_flowai_core, RiskAssessment
+from .core import DocumentDigest, FlowAICore, InvoiceFeatures, get_flowai_core, RiskAssessment
 
 logger = logging.getLogger("FlowAI")
 
+# Document text an LLM prompt includes
+PROMPT_CHARS = 8000
+
 class AnalysisMode(Enum):
     CORE_ONLY = "core_only"           # Only use FlowAI Core (fastest, ~5ms)
     LOCAL_ONLY = "local_only"          # Only use local LLM models
@@ -173,7 +177,7 @@ class FlowAIEngine:
 Analyze this {analysis_type} document and provide a comprehensive risk assessment.
 
 DOCUMENT CONTENT:
-{document_text[:8000]}
+{document_text[:PROMPT_CHARS]}
 
 ANALYSIS REQUIREMENTS:
 1. RISK SCORE: Assign a letter grade (A+, A, A-, B+, B, B-, C+, C, C-, D, F)
@@ -206,7 +210,13 @@ Return ONLY a valid JSON object:
     "quantum_score": <float 0-100>
 }}"""
     
-    def _analyze_with_core(self, document_text: str) -> Optional[AnalysisResult]:
+    def _analyze_with_core(
+        self,
+        document_text: Optional[str],
+        features: Optional[InvoiceFeatures] = None,
+        as_of: Optional[datetime.date] = None,
+        digest: Optional[DocumentDigest] = None
+    ) -> Optional[AnalysisResult]:
         """
         Analyze using FlowAI Core (proprietary ML model).
         
@@ -218,7 +228,7 @@ Return ONLY a valid JSON object:
         """
         try:
             core = get_flowai_core()
-            assessment = core.analyze(document_text)
+            assessment = core.analyze(document_text, features=features, as_of=as_of, digest=digest)
             
             return AnalysisResult(
                 risk_score=assessment.risk_grade.value,
@@ -237,7 +247,10 @@ Return ONLY a valid JSON object:
     async def analyze_document(
         self,
         document_text: str,
-        document_type: str = "invoice"
+        document_type: str = "invoice",
+        features: Optional[InvoiceFeatures] = None,
+        as_of: Optional[datetime.date] = None,
+        digest: Optional[DocumentDigest] = None
     ) -> AnalysisResult:
         """
         Analyze a financial document using FlowAI multi-model system.
@@ -248,8 +261,12 @@ Return ONLY a valid JSON object:
         3. Google Gemini Pro (cloud fallback)
         
         Args:
-            document_text: Extracted text from the document
+            document_text: Extracted text from the document; with
+                `features` and `digest`, its first PROMPT_CHARS suffice
             document_type: Type of document (invoice, receipt, etc.)
+            features: FlowAI Core features already extracted from the text
+            as_of: Date FlowAI Core counts the invoice's age to (e.g. today)
+            digest: The whole text's DocumentDigest (see FlowAICore.analyze)
             
         Returns:
             AnalysisResult with risk assessment
@@ -259,7 +276,8 @@ Return ONLY a valid JSON object:
         # ========== STRATEGY 1: FlowAI Core (fastest) ==========
         if self.mode in [AnalysisMode.CORE_ONLY, AnalysisMode.AUTO, AnalysisMode.HYBRID]:
             logger.info("🚀 Using FlowAI Core (proprietary model)...")
-            result = self._analyze_with_core(document_text)
+            # CPU-bound: keep it off the event loop
+            result = await asyncio.to_thread(self._analyze_with_core, document_text, features, as_of, digest)
             if result:
                 logger.info(f"✅ FlowAI Core: {result.risk_score} | Score: {result.quantum_score:.1f}")
                 
@@ -332,7 +350,7 @@ Return ONLY a valid JSON object:
         
         # ========== ULTIMATE FALLBACK: Use Core with default ==========
         logger.warning("⚠️ All strategies failed, using FlowAI Core fallback...")
-        fallback_result = self._analyze_with_core(document_text)
+        fallback_result = await asyncio.to_thread(self._analyze_with_core, document_text, features, as_of, digest)
         if fallback_result:
             return fallback_result
         
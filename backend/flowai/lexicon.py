@@ -0,0 +1,64 @@
+"""
+FlowAI Lexicons
+Keyword lists for sentiment and document formality scoring
+
+A lexicon file is JSON holding lists of terms under any of these keys:
+
+    {
+        "language": "en",
+        "positive": ["paid", "approved"],           # sentiment, substring
+        "negative": ["overdue", "final notice"],    # sentiment, substring
+        "professional": ["invoice", "receipt"],     # formality, whole word
+        "company": ["inc", "llc", "gmbh"]           # formality, whole word
+    }
+
+Terms match case-insensitively. Sentiment counts each distinct term found
+anywhere in the text; formality counts non-overlapping whole-word
+occurrences, separately for professional words and company indicators.
+Several files (e.g. one per language) merge into a single Lexicon.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+LEXICON_DIR = Path(__file__).parent / 'lexicons'
+DEFAULT_LEXICON = LEXICON_DIR / 'en.json'
+
+# Term categories; sentiment categories match as substrings
+CATEGORIES = ('positive', 'negative', 'professional', 'company')
+SENTIMENT_CATEGORIES = ('positive', 'negative')
+
+
+@dataclass(frozen=True)
+class Lexicon:
+    """Lower-cased, de-duplicated terms per category"""
+    positive: Tuple[str, ...] = ()
+    negative: Tuple[str, ...] = ()
+    professional: Tuple[str, ...] = ()
+    company: Tuple[str, ...] = ()
+
+    @classmethod
+    def load(cls, *paths: Union[str, os.PathLike]) -> 'Lexicon':
+        """Merge lexicon files (default: the bundled English lexicon)."""
+        terms: Dict[str, List[str]] = {category: [] for category in CATEGORIES}
+        for path in paths or (DEFAULT_LEXICON,):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            unknown = set(data) - set(CATEGORIES) - {'language'}
+            if unknown:
+                raise ValueError(f"Unknown lexicon keys in {path}: {sorted(unknown)}")
+            for category in CATEGORIES:
+                for term in data.get(category, []):
+                    term = term.lower()
+                    if term and term not in terms[category]:
+                        terms[category].append(term)
+        return cls(**{category: tuple(values) for category, values in terms.items()})
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """(category, term) pairs."""
+        for category in CATEGORIES:
+            for term in getattr(self, category):
+                yield category, term
@@ -0,0 +1,83 @@
+"""
+FlowAI Memory-Mapped Input
+Scoring extracted-text dumps without reading them into memory
+
+A text dump is one file of UTF-8 documents separated by DOCUMENT_SEPARATOR
+(the ASCII record separator, 0x1e). `open_dump` maps it read-only and
+`iter_documents` yields each document as a memoryview of the map. FlowAI
+Core scans plain-ASCII views as bytes, a bounded window at a time (see
+FlowAICore.extract_features), so documents are never decoded or copied
+whole, and only their features are kept:
+
+    with open_dump('invoices.txt') as dump:
+        features = [core.extract_features(doc) for doc in iter_documents(dump)]
+
+    batch = core.analyze_dump('invoices.txt')    # the same, then scored
+
+Resident memory is the pages being scanned plus about 100 bytes of
+features per document, whatever the size of the dump.
+"""
+
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Union
+
+from .cache import Buffer
+
+DOCUMENT_SEPARATOR = b'\x1e'
+
+
+@contextmanager
+def open_dump(path: Union[str, os.PathLike]) -> Iterator[Buffer]:
+    """Map a text dump read-only for sequential scanning."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped
+
+
+def iter_documents(buffer: Buffer, separator: bytes = DOCUMENT_SEPARATOR) -> Iterator[memoryview]:
+    """
+    Zero-copy views of the separated documents in `buffer`.
+
+    Each view is released when the next one is produced, so the map can be
+    closed after the loop; copy a document (`bytes(view)`) to keep it.
+    Empty documents, e.g. after a trailing separator, are skipped.
+    """
+    if not separator:
+        raise ValueError("separator must not be empty")
+    with memoryview(buffer) as view:
+        start = 0
+        for match in re.finditer(re.escape(separator), view):
+            if match.start() > start:
+                with view[start:match.start()] as document:
+                    yield document
+            start = match.end()
+        if len(view) > start:
+            with view[start:] as document:
+                yield document
+
+
+def write_dump(
+    path: Union[str, os.PathLike],
+    texts: Iterable[str],
+    separator: bytes = DOCUMENT_SEPARATOR
+) -> int:
+    """Write texts as a dump; returns the number of documents written."""
+    count = 0
+    with open(path, 'wb') as f:
+        for text in texts:
+            data = text.encode('utf-8')
+            if separator in data:
+                raise ValueError(f"Document {count} contains the separator {separator!r}")
+            f.write(data)
+            f.write(separator)
+            count += 1
+    return count
@@ -0,0 +1,159 @@
+"""
+FlowAI Monte Carlo PD
+Probability-of-default uncertainty by vectorized sampling
+
+`calculate_probability_of_default` gives a point estimate. `simulate_pd`
+perturbs the extracted features and model inputs N times, runs the Z-Score
+and Distance-to-Default kernels (batch.py) on all samples at once, and
+reports PD quantiles and the distribution over risk grades:
+
+    dist = core.pd_distribution(features, samples=10_000, seed=7)
+    dist.quantiles[95], dist.grade_distribution['A']
+
+Sampling is seeded (default 0), so the same invoice and settings always
+give the same distribution. 10,000 samples take about 1-2 ms.
+"""
+
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .batch import (
+    distance_to_default,
+    feature_score,
+    features_to_columns,
+    grade_index,
+    lateness,
+    modified_zscore,
+    probability_of_default,
+)
+from .core import InvoiceFeatures, ModelParams
+
+DEFAULT_QUANTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class Perturbation:
+    """
+    Noise applied to each sample's inputs (0 disables an input's noise).
+
+    Relative noise is lognormal (the value is multiplied by exp(N(0, s)), so
+    signs and zeros are kept); absolute noise is normal and clipped to the
+    input's range.
+    """
+    amount: float = 0.10                # relative: extraction / OCR error
+    payment_terms_days: float = 0.25    # relative: actual payment delay
+    completeness_score: float = 0.10    # absolute, clipped to [0, 1]
+    formality_score: float = 0.10       # absolute, clipped to [0, 1]
+    risk_free_rate: float = 0.01        # absolute
+    sigma: float = 0.20                 # relative, on the DD volatility
+
+
+@dataclass
+class PDDistribution:
+    """Sampled probability of default for one invoice"""
+    point_estimate: float  # PD of the unperturbed inputs
+    mean: float
+    std: float
+    quantiles: Dict[int, float]  # percentile -> PD
+    grade_distribution: Dict[str, float]  # grade value -> share of samples
+    samples: int
+    seed: int
+    pd_samples: np.ndarray = field(repr=False, compare=False)
+
+    def to_dict(self) -> Dict:
+        """JSON-compatible summary (without the raw samples)."""
+        return {
+            'point_estimate': self.point_estimate,
+            'mean': self.mean,
+            'std': self.std,
+            'quantiles': {str(q): value for q, value in self.quantiles.items()},
+            'grade_distribution': self.grade_distribution,
+            'samples': self.samples,
+            'seed': self.seed,
+        }
+
+
+def _relative(rng: np.random.Generator, value: np.ndarray, scale: float, n: int) -> np.ndarray:
+    if not scale:
+        return np.broadcast_to(value, (n,))
+    return value * np.exp(rng.normal(0.0, scale, n))
+
+
+def _absolute(rng: np.random.Generator, value: np.ndarray, scale: float, n: int) -> np.ndarray:
+    if not scale:
+        return np.broadcast_to(value, (n,))
+    return np.clip(value + rng.normal(0.0, scale, n), 0.0, 1.0)
+
+
+def simulate_pd(
+    features: InvoiceFeatures,
+    params: ModelParams,
+    samples: int = 10_000,
+    seed: int = 0,
+    perturbation: Optional[Perturbation] = None,
+    quantiles: Sequence[int] = DEFAULT_QUANTILES,
+    industry_risk: float = 1.0,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> PDDistribution:
+    """
+    Monte Carlo distribution of one invoice's probability of default.
+
+    Args:
+        features: Extracted invoice features
+        params: Model parameters the perturbations are applied around
+        samples: Number of draws
+        seed: Seed for the draws
+        perturbation: Input noise (default: Perturbation())
+        quantiles: Percentiles to report
+        industry_risk: PD multiplier of the invoice's industry
+        feature_weights: Weights of the feature score (default: FEATURE_WEIGHTS)
+
+    Returns:
+        PDDistribution with quantiles and grade shares
+    """
+    if samples <= 0:
+        raise ValueError("samples must be positive")
+    noise = perturbation if perturbation is not None else Perturbation()
+    rng = np.random.default_rng(seed)
+    n = samples
+
+    base = features_to_columns([features])
+    cols = dict(base)
+    cols['amount'] = _relative(rng, base['amount'], noise.amount, n)
+    cols['payment_terms_days'] = _relative(rng, base['payment_terms_days'], noise.payment_terms_days, n)
+    cols['completeness_score'] = _absolute(rng, base['completeness_score'], noise.completeness_score, n)
+    cols['formality_score'] = _absolute(rng, base['formality_score'], noise.formality_score, n)
+
+    # Sampled inputs broadcast through the kernels like any column
+    sampled = dataclasses.replace(
+        params,
+        risk_free_rate=params.risk_free_rate + (rng.normal(0.0, noise.risk_free_rate, n)
+                                               if noise.risk_free_rate else 0.0),
+    )
+    volatility = np.maximum(params.min_volatility, 0.5 - cols['completeness_score'] * 0.3)
+    volatility = _relative(rng, volatility, noise.sigma, n)
+
+    z_score = modified_zscore(cols, sampled)
+    dd = distance_to_default(cols, sampled, volatility)
+    score = feature_score(cols, sampled, industry_risk, feature_weights)
+    pd = probability_of_default(z_score, dd, sampled, industry_risk, score, lateness(cols, sampled))
+
+    point = probability_of_default(
+        modified_zscore(base, params), distance_to_default(base, params), params, industry_risk,
+        feature_score(base, params, industry_risk, feature_weights), lateness(base, params)
+    )
+    grades = tuple(params.pd_thresholds)
+    counts = np.bincount(grade_index(pd, params), minlength=len(grades))
+    return PDDistribution(
+        point_estimate=float(point[0]),
+        mean=float(pd.mean()),
+        std=float(pd.std()),
+        quantiles=dict(zip(quantiles, np.percentile(pd, quantiles).tolist())),
+        grade_distribution={grade.value: count / n for grade, count in zip(grades, counts.tolist())},
+        samples=n,
+        seed=seed,
+        pd_samples=pd,
+    )
@@ -0,0 +1,265 @@
+"""
+FlowAI Online Calibration
+Keep the PD model current from repayment and default outcomes as they arrive
+
+The OnlineCalibrator fits the same logistic model of default on the feature
+score signals as training.py, one outcome at a time: each event takes one
+adaptive gradient step (AdaGrad, a step size per signal) in O(signals),
+so outcomes can be applied as listings settle instead of retraining over
+the whole history.
+
+The current fit is written out as a candidate ModelArtifact (PD = the
+learned logistic model alone, as `train` produces, so it replaces the
+starting model's Z-Score and DD terms) every `snapshot_events` outcomes or
+`snapshot_seconds` seconds, whichever comes first. A candidate is served
+only once it is promoted explicitly, after `validate`:
+
+    calibrator = OnlineCalibrator(artifact=trained, path='candidate.json.gz')
+    calibrator.record(features, defaulted=False)    # a funded invoice was repaid
+    calibrator.record(features, defaulted=True)
+
+    candidate = ModelArtifact.load('candidate.json.gz')
+    calibrator.validate(candidate)    # ValueError unless it beat the starting model
+    reload_flowai_core(candidate)
+
+Start from an artifact fitted by `train` where one exists: the built-in
+model does not use the logistic PD, so its weights are only a starting
+point and no snapshot is taken before `min_events` outcomes. Never write
+snapshots over a served artifact file (FLOWAI_MODEL_ARTIFACT): engines
+watching it would serve them unvalidated.
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from .core import FEATURE_WEIGHTS, FlowAICore, InvoiceFeatures, ModelArtifact
+from .training import DEFAULT_L2, fitted_artifact
+
+DEFAULT_LEARNING_RATE = 0.2
+# AdaGrad's squared-gradient sums start here, which bounds the first steps
+# at learning_rate * |gradient|
+INITIAL_ACCUMULATOR = 1.0
+
+DEFAULT_SNAPSHOT_EVENTS = 1000
+DEFAULT_SNAPSHOT_SECONDS = 3600.0
+DEFAULT_MIN_EVENTS = 500
+
+
+def _log_loss(p: float, defaulted: bool) -> float:
+    clipped = min(max(p, 1e-15), 1 - 1e-15)
+    return -math.log(clipped) if defaulted else -math.log1p(-clipped)
+
+
+@dataclass
+class OnlineReport:
+    """Progress of an OnlineCalibrator"""
+    events: int
+    defaults: int
+    # Mean log loss of each outcome's PD predicted before learning from it
+    log_loss: float
+    # Mean log loss of the starting artifact's PD on the same outcomes
+    baseline_log_loss: float
+    snapshots: int
+    version: Optional[str]  # of the last snapshot
+
+
+class OnlineCalibrator:
+    """
+    Incremental logistic PD model updated from invoice outcomes.
+
+    Safe to share between threads.
+
+    Args:
+        artifact: Model to start from, which candidates are validated
+            against and whose extraction and industry multipliers
+            snapshots keep (default: the built-in one)
+        path: Artifact file snapshots are written to (None: not written)
+        on_snapshot: Called with each snapshot (e.g. to log or alert);
+            promote snapshots through `validate`, not from here
+        learning_rate: AdaGrad step size
+        l2: Ridge penalty on the coefficients, per event
+        snapshot_events: Outcomes between snapshots
+        snapshot_seconds: Seconds between snapshots (checked per outcome)
+        min_events: Outcomes before the first snapshot when starting from
+            an artifact whose PD is not the logistic model
+    """
+
+    def __init__(
+        self,
+        artifact: Optional[ModelArtifact] = None,
+        path: Union[str, os.PathLike, None] = None,
+        on_snapshot: Optional[Callable[[ModelArtifact], object]] = None,
+        learning_rate: float = DEFAULT_LEARNING_RATE,
+        l2: float = DEFAULT_L2,
+        snapshot_events: int = DEFAULT_SNAPSHOT_EVENTS,
+        snapshot_seconds: float = DEFAULT_SNAPSHOT_SECONDS,
+        min_events: int = DEFAULT_MIN_EVENTS
+    ):
+        if learning_rate <= 0:
+            raise ValueError("learning_rate must be positive")
+        if l2 < 0:
+            raise ValueError("l2 must not be negative")
+        if snapshot_events < 1:
+            raise ValueError("snapshot_events must be at least 1")
+        self.artifact = artifact if artifact is not None else ModelArtifact()
+        self.path = os.fspath(path) if path is not None else None
+        self.on_snapshot = on_snapshot
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.snapshot_events = snapshot_events
+        self.snapshot_seconds = snapshot_seconds
+        self._core = FlowAICore(artifact=self.artifact)
+        self._lock = threading.Lock()
+
+        # Coefficients [intercept, signals in FEATURE_WEIGHTS order], warm
+        # started from the artifact's logistic PD
+        params = self.artifact.params
+        weights = self.artifact.feature_weights
+        self._beta = np.array(
+            [params.score_pd_intercept] +
+            [params.score_pd_slope * weights.get(name, 0.0) for name in FEATURE_WEIGHTS]
+        )
+        self._penalty = np.full(len(self._beta), l2)
+        self._penalty[0] = 0.0
+        self._accumulator = np.full(len(self._beta), INITIAL_ACCUMULATOR)
+        trained = params.score_weight == 1.0 and params.z_score_weight == 0.0 and params.dd_weight == 0.0
+        self._min_events = 0 if trained else min_events
+
+        self.events = 0
+        self.defaults = 0
+        self.snapshots = 0
+        self._loss = 0.0
+        self._baseline_loss = 0.0
+        self._pending = 0
+        self._last_snapshot = time.monotonic()
+        self._version: Optional[str] = None
+
+    def _signals(self, features: InvoiceFeatures) -> np.ndarray:
+        signals = self._core.calculate_feature_signals(features)
+        x = np.empty(len(self._beta))
+        x[0] = 1.0
+        x[1:] = [signals[name] for name in FEATURE_WEIGHTS]
+        return x
+
+    def probability(self, features: InvoiceFeatures) -> float:
+        """Logistic PD of an invoice under the current fit (before clipping)."""
+        z = float(self._beta @ self._signals(features))
+        return 0.5 + 0.5 * math.tanh(z / 2)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def record(self, features: InvoiceFeatures, defaulted: bool) -> float:
+        """
+        Learn from one settled invoice; takes a snapshot when one is due.
+
+        Args:
+            features: The invoice's features as it was scored (extracted
+                with the same as_of), not as of settlement, when every
+                invoice would look overdue
+            defaulted: True if it defaulted, False if it was repaid
+
+        Returns:
+            The invoice's PD predicted before this outcome was learned
+        """
+        x = self._signals(features)
+        y = 1.0 if defaulted else 0.0
+        baseline = self._core.score_features(features).probability_of_default
+        with self._lock:
+            beta = self._beta
+            p = 0.5 + 0.5 * math.tanh(float(beta @ x) / 2)
+            gradient = (p - y) * x + self._penalty * beta
+            self._accumulator += gradient * gradient
+            beta -= self.learning_rate * gradient / np.sqrt(self._accumulator)
+
+            self.events += 1
+            self.defaults += int(defaulted)
+            self._loss += _log_loss(p, defaulted)
+            self._baseline_loss += _log_loss(baseline, defaulted)
+            self._pending += 1
+            due = self.events >= self._min_events and (
+                self._pending >= self.snapshot_events or
+                time.monotonic() - self._last_snapshot >= self.snapshot_seconds
+            )
+        if due:
+            self.snapshot()
+        return p
+
+    def record_many(self, outcomes: Iterable[Tuple[InvoiceFeatures, bool]]) -> int:
+        """Learn from (features, defaulted) pairs in order; returns the number recorded."""
+        count = 0
+        for features, defaulted in outcomes:
+            self.record(features, defaulted)
+            count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def current_artifact(self) -> ModelArtifact:
+        """The current fit as a ModelArtifact (like `train` produces)."""
+        with self._lock:
+            beta = self._beta.copy()
+        return fitted_artifact(self.artifact, beta[0], beta[1:])
+
+    def snapshot(self) -> ModelArtifact:
+        """Write the current fit to `path` (if set), pass it to `on_snapshot` and return it."""
+        artifact = self.current_artifact()
+        if self.path is not None:
+            artifact.save(self.path)
+        with self._lock:
+            self.snapshots += 1
+            self._pending = 0
+            self._last_snapshot = time.monotonic()
+            self._version = artifact.version
+        if self.on_snapshot is not None:
+            self.on_snapshot(artifact)
+        return artifact
+
+    def validate(self, artifact: ModelArtifact) -> None:
+        """
+        Check that `artifact` may be promoted to serving.
+
+        It must be this calibrator's last snapshot (e.g. as read back from
+        `path`) and the fit must have predicted the outcomes recorded so far
+        better, by progressive log loss, than the starting artifact did.
+
+        Raises:
+            ValueError: If it may not be promoted
+        """
+        report = self.report()
+        if report.version is None or artifact.version != report.version:
+            raise ValueError(
+                f"Model {artifact.version} is not this calibrator's last snapshot ({report.version})"
+            )
+        if report.log_loss >= report.baseline_log_loss:
+            raise ValueError(
+                f"Calibrated log loss {report.log_loss:.4f} is not below the "
+                f"starting model's {report.baseline_log_loss:.4f} over {report.events} outcomes"
+            )
+
+    def flush(self) -> Optional[ModelArtifact]:
+        """Snapshot outcomes recorded since the last snapshot, if any (e.g. at shutdown)."""
+        with self._lock:
+            due = self._pending > 0 and self.events >= self._min_events
+        return self.snapshot() if due else None
+
+    def report(self) -> OnlineReport:
+        """Counts and progressive log loss so far."""
+        with self._lock:
+            return OnlineReport(
+                events=self.events,
+                defaults=self.defaults,
+                log_loss=self._loss / self.events if self.events else 0.0,
+                baseline_log_loss=self._baseline_loss / self.events if self.events else 0.0,
+                snapshots=self.snapshots,
+                version=self._version,
+            )
@@ -0,0 +1,201 @@
+"""
+FlowAI Parallel Scoring
+Process-pool executor for bulk FlowAI Core analysis
+
+FlowAI Core is pure Python and CPU-bound, so a single process scores on one
+core. `analyze_many` fans chunks of documents out to a pool of worker
+processes. Each worker builds its own FlowAICore (and compiled patterns) once
+at start-up, then streams results back either in input order or as chunks
+complete:
+
+    report = PoolReport()
+    for index, assessment in core.analyze_many(texts, workers=32, report=report):
+        ...
+    print(report.throughput, report.workers)
+"""
+
+import datetime
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from .core import ExtractionLimits, FlowAICore, ModelArtifact, RiskAssessment
+
+# Chunks allowed in flight (submitted but not yet yielded) per worker
+PENDING_CHUNKS_PER_WORKER = 4
+
+Chunk = List[Tuple[int, str]]
+
+
+@dataclass
+class WorkerStats:
+    """Work done by one pool process"""
+    pid: int
+    documents: int = 0
+    chars: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Documents per busy second."""
+        return self.documents / self.busy_seconds if self.busy_seconds else 0.0
+
+
+@dataclass
+class PoolReport:
+    """Throughput of an `analyze_many` run, filled in as results stream"""
+    workers: Dict[int, WorkerStats] = field(default_factory=dict)
+    documents: int = 0
+    wall_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Documents per wall-clock second across all workers."""
+        return self.documents / self.wall_seconds if self.wall_seconds else 0.0
+
+    def record(self, pid: int, documents: int, chars: int, busy_seconds: float) -> None:
+        stats = self.workers.get(pid)
+        if stats is None:
+            stats = self.workers[pid] = WorkerStats(pid)
+        stats.documents += documents
+        stats.chars += chars
+        stats.busy_seconds += busy_seconds
+        self.documents += documents
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+_worker_core: Optional[FlowAICore] = None
+
+
+def _init_worker(
+    core_class: Type[FlowAICore],
+    artifact: Optional[ModelArtifact],
+    limits: Optional[ExtractionLimits]
+) -> None:
+    """Build the per-process engine once."""
+    global _worker_core
+    _worker_core = core_class(artifact=artifact, limits=limits)
+
+
+def _analyze_chunk(
+    chunk: Chunk,
+    explain: bool,
+    as_of: Optional[datetime.date]
+) -> Tuple[int, List[Tuple[int, RiskAssessment]], int, float]:
+    """Score one chunk; returns (pid, results, chars, busy seconds)."""
+    start = time.perf_counter()
+    results = []
+    chars = 0
+    for index, text in chunk:
+        assessment = _worker_core.analyze(text, explain=explain, as_of=as_of)
+        # Without explain, drop the renderer so no text crosses the pipe
+        assessment.explainer = None
+        results.append((index, assessment))
+        chars += len(text)
+    return os.getpid(), results, chars, time.perf_counter() - start
+
+
+# ============================================================================
+# PARENT SIDE
+# ============================================================================
+
+def _chunks(texts: Iterable[str], chunksize: int) -> Iterator[Chunk]:
+    numbered = enumerate(texts)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_many(
+    core_class: Type[FlowAICore],
+    texts: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    explain: bool = False,
+    report: Optional[PoolReport] = None,
+    artifact: Optional[ModelArtifact] = None,
+    limits: Optional[ExtractionLimits] = None,
+    as_of: Optional[datetime.date] = None
+) -> Iterator[Tuple[int, RiskAssessment]]:
+    """
+    Analyze documents on a pool of worker processes.
+
+    `texts` is consumed lazily: at most PENDING_CHUNKS_PER_WORKER chunks per
+    worker are submitted or buffered at any time, so arbitrarily long inputs
+    run in bounded memory.
+
+    Args:
+        core_class: Engine class each worker instantiates
+        texts: Extracted document texts
+        workers: Number of processes (default: all CPUs)
+        chunksize: Documents per task sent to a worker
+        ordered: Yield in input order; otherwise as chunks complete
+        explain: Also return summary and reasoning text; without it the
+            text fields of the results are None
+        report: Optional PoolReport updated with per-worker throughput
+        artifact: Model for the worker engines (default: the built-in model)
+        limits: Extraction bounds for the worker engines (default: none)
+        as_of: Date invoice ages are counted to (see FlowAICore.analyze)
+
+    Yields:
+        (input index, RiskAssessment) pairs
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be positive")
+    workers = workers or os.cpu_count() or 1
+    report = report if report is not None else PoolReport()
+    max_pending = workers * PENDING_CHUNKS_PER_WORKER
+    start = time.perf_counter()
+
+    chunks = enumerate(_chunks(texts, chunksize))
+    running: Dict[Future, int] = {}
+    finished: Dict[int, List[Tuple[int, RiskAssessment]]] = {}
+    next_chunk = 0
+    exhausted = False
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(core_class, artifact, limits)
+    ) as pool:
+        try:
+            while True:
+                while not exhausted and len(running) + len(finished) < max_pending:
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    chunk_id, chunk = item
+                    running[pool.submit(_analyze_chunk, chunk, explain, as_of)] = chunk_id
+
+                if not running and not finished:
+                    break
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk_id = running.pop(future)
+                        pid, results, chars, busy = future.result()
+                        report.record(pid, len(results), chars, busy)
+                        finished[chunk_id] = results
+
+                if ordered:
+                    while next_chunk in finished:
+                        yield from finished.pop(next_chunk)
+                        next_chunk += 1
+                else:
+                    for chunk_id in list(finished):
+                        yield from finished.pop(chunk_id)
+                report.wall_seconds = time.perf_counter() - start
+        finally:
+            for future in running:
+                future.cancel()
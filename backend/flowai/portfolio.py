@@ -0,0 +1,337 @@
+"""
+FlowAI Portfolio Analytics
+Columnar risk aggregation over marketplace listings
+
+Listings (as in marketplace_data_full.json) are stored column-wise, their
+grades mapped to a PD at the middle of the grade's PD_THRESHOLDS band. The
+portfolio keeps running totals per funding state (open / funded), so adding
+or funding a listing updates them in O(1) and `metrics()` costs O(vendors)
+whatever the number of listings:
+
+    portfolio = Portfolio.from_json('marketplace_data_full.json')
+    portfolio.add({'id': 'INV-9001', 'vendor': 'Acme', 'amount': 12000,
+                   'score': 'A-', 'yield': '11.5%', 'term': '30 Days'})
+    portfolio.fund('INV-9001')
+    portfolio.metrics('funded').expected_loss
+
+Expected loss is exposure x PD x LGD, with exposure the listing amount.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from .core import DEFAULT_PARAMS, ModelParams
+from .store import StringPool
+
+# Loss given default (Basel foundation IRB, senior unsecured)
+DEFAULT_LGD = 0.45
+
+# Term buckets: upper edges in days (inclusive), last bucket open-ended
+TERM_BUCKET_EDGES = (30, 60, 90)
+TERM_BUCKET_LABELS = ('0-30', '31-60', '61-90', '90+')
+
+STATUSES = ('open', 'funded', 'all')
+
+LISTING_DTYPES: Dict[str, type] = {
+    'amount': np.float64,
+    'grade': np.int8,
+    'yield_rate': np.float64,
+    'term_days': np.int32,
+    'vendor': np.int32,
+    'funded': np.bool_,
+}
+
+Listing = Mapping[str, object]
+
+
+def grade_pd(params: ModelParams = DEFAULT_PARAMS) -> np.ndarray:
+    """PD per grade (in pd_thresholds order): the middle of its band."""
+    return np.array([(low + high) / 2 for low, high in params.pd_thresholds.values()])
+
+
+def _parse_rate(value) -> float:
+    """'16.0%' -> 0.16; plain numbers are already fractions."""
+    if isinstance(value, str):
+        value = value.strip()
+        return float(value[:-1]) / 100 if value.endswith('%') else float(value)
+    return float(value)
+
+
+def _parse_days(value) -> int:
+    """'45 Days' -> 45."""
+    if isinstance(value, str):
+        return int(value.split()[0])
+    return int(value)
+
+
+@dataclass
+class PortfolioMetrics:
+    """Aggregates over one funding state of a portfolio"""
+    status: str
+    listings: int
+    exposure: float
+    expected_loss: float
+    expected_loss_rate: float  # expected loss / exposure
+    weighted_pd: float  # exposure-weighted
+    weighted_yield: float  # exposure-weighted
+    hhi: float  # Herfindahl-Hirschman index of vendor exposure shares (0-1)
+    top_vendors: List[Tuple[str, float, float]]  # (vendor, exposure, share)
+    term_exposure: Dict[str, float]
+    grade_exposure: Dict[str, float]
+
+    def to_dict(self) -> Dict:
+        data = dict(self.__dict__)
+        data['top_vendors'] = [
+            {'vendor': vendor, 'exposure': exposure, 'share': share}
+            for vendor, exposure, share in self.top_vendors
+        ]
+        return data
+
+
+class Portfolio:
+    """
+    Marketplace listings with incrementally maintained risk aggregates.
+
+    Args:
+        lgd: Loss given default used for expected loss
+        params: Model parameters whose pd_thresholds define the grades
+        capacity: Initial number of listing rows
+    """
+
+    def __init__(
+        self,
+        lgd: float = DEFAULT_LGD,
+        params: Optional[ModelParams] = None,
+        capacity: int = 1024
+    ):
+        params = params if params is not None else DEFAULT_PARAMS
+        self.lgd = lgd
+        self.grades = tuple(params.pd_thresholds)
+        self.grade_pd = grade_pd(params)
+        self._grade_codes = {grade.value: code for code, grade in enumerate(self.grades)}
+        self.vendors = StringPool()
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(max(1, capacity), dtype=dtype)
+            for name, dtype in LISTING_DTYPES.items()
+        }
+        self._reset_totals()
+
+    @classmethod
+    def from_json(cls, path: Union[str, os.PathLike], **kwargs) -> 'Portfolio':
+        """Load a marketplace listings file (a JSON list of listings)."""
+        with open(path, encoding='utf-8') as f:
+            listings = json.load(f)
+        portfolio = cls(capacity=len(listings), **kwargs)
+        portfolio.extend(listings)
+        return portfolio
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, listing_id: str) -> bool:
+        return listing_id in self._rows
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one listing column."""
+        return self._columns[name][:self._size]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _reset_totals(self) -> None:
+        # Running sums, row 0 for open and row 1 for funded listings
+        self._count = np.zeros(2, dtype=np.int64)
+        self._exposure = np.zeros(2)
+        self._expected_loss = np.zeros(2)
+        self._yield_exposure = np.zeros(2)
+        self._grade_exposure = np.zeros((2, len(self.grades)))
+        self._term_exposure = np.zeros((2, len(TERM_BUCKET_LABELS)))
+        self._vendor_exposure = np.zeros((2, 64))
+
+    def _reserve(self, rows: int) -> None:
+        if rows > len(self._columns['amount']):
+            capacity = max(rows, 2 * len(self._columns['amount']))
+            for name, col in self._columns.items():
+                grown = np.empty(capacity, dtype=col.dtype)
+                grown[:self._size] = col[:self._size]
+                self._columns[name] = grown
+        vendors = len(self.vendors)
+        if vendors > self._vendor_exposure.shape[1]:
+            grown = np.zeros((2, max(vendors, 2 * self._vendor_exposure.shape[1])))
+            grown[:, :self._vendor_exposure.shape[1]] = self._vendor_exposure
+            self._vendor_exposure = grown
+
+    def _parse(self, listing: Listing) -> Tuple:
+        listing_id = str(listing['id'])
+        if listing_id in self._rows:
+            raise ValueError(f"Duplicate listing id: {listing_id}")
+        grade = self._grade_codes.get(listing['score'])
+        if grade is None:
+            raise ValueError(f"Unknown grade {listing['score']!r} for listing {listing_id}")
+        return (
+            listing_id,
+            float(listing['amount']),
+            grade,
+            _parse_rate(listing.get('yield', 0.0)),
+            _parse_days(listing.get('term', 0)),
+            self.vendors.intern(str(listing.get('vendor', ''))),
+            bool(listing.get('isFunded', False)),
+        )
+
+    def _accumulate(self, row: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one row's contribution."""
+        cols = self._columns
+        amount = sign * cols['amount'][row]
+        grade = cols['grade'][row]
+        state = int(cols['funded'][row])
+        self._count[state] += sign
+        self._exposure[state] += amount
+        self._expected_loss[state] += amount * self.grade_pd[grade] * self.lgd
+        self._yield_exposure[state] += amount * cols['yield_rate'][row]
+        self._grade_exposure[state, grade] += amount
+        bucket = np.searchsorted(TERM_BUCKET_EDGES, cols['term_days'][row])
+        self._term_exposure[state, bucket] += amount
+        self._vendor_exposure[state, cols['vendor'][row]] += amount
+
+    def _accumulate_rows(self, start: int, stop: int) -> None:
+        """Add the contributions of rows [start, stop) in one vectorized pass."""
+        cols = {name: col[start:stop] for name, col in self._columns.items()}
+        amount = cols['amount']
+        buckets = np.searchsorted(TERM_BUCKET_EDGES, cols['term_days'])
+        loss = amount * self.grade_pd[cols['grade']] * self.lgd
+        for state in (0, 1):
+            mask = cols['funded'] == bool(state)
+            weights = amount[mask]
+            self._count[state] += int(mask.sum())
+            self._exposure[state] += weights.sum()
+            self._expected_loss[state] += loss[mask].sum()
+            self._yield_exposure[state] += (weights * cols['yield_rate'][mask]).sum()
+            self._grade_exposure[state] += np.bincount(
+                cols['grade'][mask], weights=weights, minlength=len(self.grades))
+            self._term_exposure[state] += np.bincount(
+                buckets[mask], weights=weights, minlength=len(TERM_BUCKET_LABELS))
+            vendors = np.bincount(cols['vendor'][mask], weights=weights)
+            self._vendor_exposure[state, :len(vendors)] += vendors
+
+    def _append(self, parsed: Tuple) -> int:
+        listing_id, *values = parsed
+        row = self._size
+        for name, value in zip(LISTING_DTYPES, values):
+            self._columns[name][row] = value
+        self._rows[listing_id] = row
+        self.ids.append(listing_id)
+        self._size = row + 1
+        return row
+
+    def add(self, listing: Listing) -> int:
+        """Add one listing; returns its row."""
+        parsed = self._parse(listing)
+        self._reserve(self._size + 1)
+        row = self._append(parsed)
+        self._accumulate(row, 1)
+        return row
+
+    def extend(self, listings: Iterable[Listing]) -> None:
+        """Add many listings, parsing, storing and aggregating them column-wise."""
+        listings = list(listings)
+        if not listings:
+            return
+        listing_ids = [str(listing['id']) for listing in listings]
+        if len(set(listing_ids)) < len(listing_ids) or not self._rows.keys().isdisjoint(listing_ids):
+            seen = set(self._rows)
+            duplicate = next(i for i in listing_ids if i in seen or seen.add(i))
+            raise ValueError(f"Duplicate listing id: {duplicate}")
+        unknown = {listing['score'] for listing in listings} - set(self._grade_codes)
+        if unknown:
+            raise ValueError(f"Unknown grades {sorted(map(str, unknown))}")
+
+        def parsed(key: str, default, parse) -> List:
+            # Marketplace fields repeat ('45 Days', '16.0%'), so parse each
+            # distinct value once
+            values = [listing.get(key, default) for listing in listings]
+            lookup = {value: parse(value) for value in dict.fromkeys(values)}
+            return [lookup[value] for value in values]
+
+        columns = {
+            'amount': [listing['amount'] for listing in listings],
+            'grade': parsed('score', None, self._grade_codes.__getitem__),
+            'yield_rate': parsed('yield', 0.0, _parse_rate),
+            'term_days': parsed('term', 0, _parse_days),
+            'vendor': parsed('vendor', '', lambda vendor: self.vendors.intern(str(vendor))),
+            'funded': [bool(listing.get('isFunded', False)) for listing in listings],
+        }
+        start, stop = self._size, self._size + len(listings)
+        self._reserve(stop)
+        for name, values in columns.items():
+            self._columns[name][start:stop] = values
+        self._rows.update(zip(listing_ids, range(start, stop)))
+        self.ids.extend(listing_ids)
+        self._size = stop
+        self._accumulate_rows(start, stop)
+
+    def fund(self, listing_id: str) -> None:
+        """Mark a listing funded, moving its exposure to the funded totals."""
+        row = self._rows[listing_id]
+        if self._columns['funded'][row]:
+            return
+        self._accumulate(row, -1)
+        self._columns['funded'][row] = True
+        self._accumulate(row, 1)
+
+    def recompute(self) -> None:
+        """Rebuild the running totals from the listing columns."""
+        self._reset_totals()
+        self._reserve(self._size)
+        self._accumulate_rows(0, self._size)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def metrics(self, status: str = 'all', top: int = 10) -> PortfolioMetrics:
+        """
+        Risk aggregates for open, funded or all listings.
+
+        Args:
+            status: 'open', 'funded' or 'all'
+            top: Number of largest vendor exposures to list
+        """
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}")
+        states = {'open': [0], 'funded': [1], 'all': [0, 1]}[status]
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return values[states].sum(axis=0)
+
+        exposure = float(total(self._exposure))
+        expected_loss = float(total(self._expected_loss))
+        vendors = total(self._vendor_exposure)[:len(self.vendors)]
+        shares = vendors / exposure if exposure else np.zeros_like(vendors)
+        order = np.argsort(vendors)[::-1][:top]
+        return PortfolioMetrics(
+            status=status,
+            listings=int(total(self._count)),
+            exposure=exposure,
+            expected_loss=expected_loss,
+            expected_loss_rate=expected_loss / exposure if exposure else 0.0,
+            weighted_pd=expected_loss / (exposure * self.lgd) if exposure and self.lgd else 0.0,
+            weighted_yield=float(total(self._yield_exposure)) / exposure if exposure else 0.0,
+            hhi=float((shares ** 2).sum()),
+            top_vendors=[
+                (self.vendors.lookup(int(code)), float(vendors[code]), float(shares[code]))
+                for code in order if vendors[code] > 0
+            ],
+            term_exposure=dict(zip(TERM_BUCKET_LABELS, total(self._term_exposure).tolist())),
+            grade_exposure={
+                grade.value: exposure for grade, exposure in
+                zip(self.grades, total(self._grade_exposure).tolist())
+            },
+        )
@@ -0,0 +1,237 @@
+"""
+FlowAI Feature Store
+Columnar (structure-of-arrays) storage for InvoiceFeatures
+
+A FeatureTable keeps one typed NumPy column per InvoiceFeatures field instead
+of one Python object per invoice. Text fields (currency, vendor, client,
+dates, industry) are interned into a shared string pool and stored as int32 codes.
+A row costs 77 bytes, against roughly 300 bytes for an InvoiceFeatures
+instance and its attribute values.
+
+Slices are zero-copy views, and `columns()` exposes the arrays the batch
+scoring kernels consume directly:
+
+    table = FeatureTable.from_features(core.extract_features(t) for t in texts)
+    batch = core.analyze_batch(features=table[:100_000])
+
+Tables persist as .npz snapshots, so a book can be re-rated under new
+model parameters without re-reading any document:
+
+    table.save('book.npz')
+    batch = core.analyze_batch(features=FeatureTable.load('book.npz'), params=params)
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .core import InvoiceFeatures
+from .batch import SCORING_COLUMNS
+
+# Column dtype per InvoiceFeatures field; str fields hold string pool codes
+COLUMN_DTYPES: Dict[str, type] = {
+    'amount': np.float64,
+    'currency': np.int32,
+    'vendor_name': np.int32,
+    'client_name': np.int32,
+    'invoice_date': np.int32,
+    'due_date': np.int32,
+    'payment_terms_days': np.int32,  # at most MAX_STATED_TERM_DAYS when extracted
+    'age_days': np.int32,
+    'text_length': np.int64,
+    'has_logo': np.bool_,
+    'has_address': np.bool_,
+    'has_tax_id': np.bool_,
+    'has_bank_details': np.bool_,
+    'sentiment_score': np.float64,
+    'formality_score': np.float64,
+    'completeness_score': np.float64,
+    'truncated': np.bool_,
+    'industry': np.int32,
+}
+
+# Fields stored as string pool codes (-1 encodes None)
+STRING_COLUMNS = ('currency', 'vendor_name', 'client_name', 'invoice_date', 'due_date', 'industry')
+
+_NONE_CODE = -1
+
+# Snapshot layout version, and the archive entry holding the string pool
+SNAPSHOT_FORMAT = 1
+_POOL_ENTRY = '__pool__'
+
+
+class StringPool:
+    """Interns strings to dense int32 codes shared by every column."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._strings: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: Optional[str]) -> int:
+        """Return the code for `value`, adding it on first sight."""
+        if value is None:
+            return _NONE_CODE
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._codes[value] = code
+            self._strings.append(value)
+        return code
+
+    def find(self, value: str) -> Optional[int]:
+        """Return the code for `value` without interning it (None if unseen)."""
+        return self._codes.get(value)
+
+    def lookup(self, code: int) -> Optional[str]:
+        """Return the string for `code` (None for the null code)."""
+        return None if code == _NONE_CODE else self._strings[code]
+
+
+class FeatureTable:
+    """
+    Structure-of-arrays table of InvoiceFeatures.
+
+    Columns are preallocated and grow geometrically, so `append` is
+    amortised O(1). Integer indexing materializes an InvoiceFeatures;
+    slice indexing returns a FeatureTable whose columns are views of this
+    one (no copy). Appending to a view reallocates its columns first, so
+    it never writes into the parent.
+    """
+
+    def __init__(self, capacity: int = 1024, pool: Optional[StringPool] = None):
+        self.pool = pool if pool is not None else StringPool()
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(max(1, capacity), dtype=dtype)
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+
+    @classmethod
+    def from_features(cls, features: Iterable[InvoiceFeatures], capacity: int = 1024) -> 'FeatureTable':
+        """Build a table from any iterable of InvoiceFeatures."""
+        table = cls(capacity=capacity)
+        table.extend(features)
+        return table
+
+    @classmethod
+    def _view(cls, columns: Dict[str, np.ndarray], pool: StringPool) -> 'FeatureTable':
+        table = cls.__new__(cls)
+        table.pool = pool
+        table._columns = columns
+        table._size = len(columns['amount'])
+        return table
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns['amount'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the filled part of the columns."""
+        return sum(col[:self._size].nbytes for col in self._columns.values())
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(min_capacity, 2 * self.capacity)
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, features: InvoiceFeatures) -> int:
+        """Append one invoice's features; returns its row index."""
+        row = self._size
+        if row >= self.capacity:
+            self._grow(row + 1)
+        cols = self._columns
+        for name in COLUMN_DTYPES:
+            value = getattr(features, name)
+            if name in STRING_COLUMNS:
+                value = self.pool.intern(value)
+            cols[name][row] = value
+        self._size = row + 1
+        return row
+
+    def extend(self, features: Iterable[InvoiceFeatures]) -> None:
+        """Append many invoices' features."""
+        for item in features:
+            self.append(item)
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one column (string columns hold pool codes)."""
+        return self._columns[name][:self._size]
+
+    def columns(self, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy views of several columns.
+
+        Defaults to the columns read by the batch scoring kernels, so the
+        result can be passed straight to `batch.score_columns`.
+        """
+        names = SCORING_COLUMNS if names is None else names
+        return {name: self.column(name) for name in names}
+
+    def strings(self, name: str) -> List[Optional[str]]:
+        """Decode a string column back to Python strings."""
+        lookup = self.pool.lookup
+        return [lookup(code) for code in self.column(name).tolist()]
+
+    def row(self, index: int) -> InvoiceFeatures:
+        """Materialize one row as InvoiceFeatures."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("FeatureTable index out of range")
+        values = {}
+        for name, col in self._columns.items():
+            value = col[index].item()
+            if name in STRING_COLUMNS:
+                value = self.pool.lookup(value)
+            values[name] = value
+        return InvoiceFeatures(**values)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[InvoiceFeatures, 'FeatureTable']:
+        if isinstance(key, slice):
+            return self._view(
+                {name: col[:self._size][key] for name, col in self._columns.items()},
+                self.pool,
+            )
+        return self.row(key)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self.row(index)
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """Write the filled rows and string pool to an uncompressed .npz file."""
+        pool = json.dumps({'format': SNAPSHOT_FORMAT, 'strings': self.pool._strings})
+        np.savez(path, **{_POOL_ENTRY: np.array(pool)}, **{
+            name: self.column(name) for name in COLUMN_DTYPES
+        })
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'FeatureTable':
+        """Read a table written by `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            header = json.loads(archive[_POOL_ENTRY].item())
+            fmt = header.get('format')
+            if fmt != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unsupported feature snapshot format: {fmt}")
+            missing = set(COLUMN_DTYPES) - set(archive.files)
+            if missing:
+                raise ValueError(f"Feature snapshot is missing columns: {sorted(missing)}")
+            columns = {
+                name: archive[name].astype(dtype, copy=False)
+                for name, dtype in COLUMN_DTYPES.items()
+            }
+        pool = StringPool()
+        for value in header['strings']:
+            pool.intern(value)
+        return cls._view(columns, pool)
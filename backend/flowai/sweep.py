@@ -0,0 +1,140 @@
+"""
+FlowAI Sensitivity Sweeps
+Vectorized what-if grids over invoice features and model parameters
+
+A sweep re-scores invoices over the Cartesian product of parameter grids in
+one call. Each grid becomes its own array axis and the batch kernels
+(batch.py) evaluate every combination by broadcasting, so no Python code
+runs per grid point:
+
+    result = core.sweep(features, {
+        'payment_terms_days': [15, 30, 60, 90],
+        'risk_free_rate': np.linspace(0.0, 0.10, 51),
+        'sigma': np.linspace(0.1, 0.6, 51),
+    })
+    result.probability_of_default.shape    # (4, 51, 51)
+
+Axes may name a scoring feature (SCORING_COLUMNS), a scalar ModelParams
+field, or 'sigma', which replaces the completeness-based volatility of the
+Distance-to-Default. Results are BatchAssessment columns shaped
+(invoices, *grid), without the invoice axis when one InvoiceFeatures is
+given. Memory grows with invoices x grid points, about 100 bytes each.
+"""
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batch import SCORING_COLUMNS, BatchAssessment, features_to_columns, score_columns
+from .core import InvoiceFeatures, ModelParams
+from .store import FeatureTable
+
+# ModelParams fields that take a single number and can be swept
+PARAM_AXES = tuple(f.name for f in dataclasses.fields(ModelParams) if f.type is float)
+FEATURE_AXES = tuple(SCORING_COLUMNS)
+VOLATILITY_AXIS = 'sigma'
+
+Grid = Mapping[str, Union[Sequence[float], np.ndarray]]
+
+
+@dataclass
+class SweepResult:
+    """Assessments over a parameter grid"""
+    axes: Dict[str, np.ndarray]  # grid values per axis, in axis order
+    assessment: BatchAssessment  # columns shaped (invoices, *grid) or (*grid)
+
+    def __getattr__(self, name: str):
+        # Expose the assessment columns directly (result.probability_of_default)
+        if name == 'assessment':
+            raise AttributeError(name)
+        return getattr(self.assessment, name)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.assessment.probability_of_default.shape
+
+    def grade_labels(self) -> np.ndarray:
+        """Risk grade value ('A+', ..., 'F') at every grid point."""
+        labels = np.array([grade.value for grade in self.assessment.grades])
+        return labels[self.assessment.grade_index]
+
+    def point(self, index: Tuple[int, ...]) -> Dict[str, float]:
+        """Grid values at a grid index (without the invoice axis)."""
+        return {name: values[i].item() for (name, values), i in zip(self.axes.items(), index)}
+
+
+def sweep(
+    features: Union[InvoiceFeatures, Sequence[InvoiceFeatures], FeatureTable],
+    grid: Grid,
+    params: ModelParams,
+    industry_risk: Optional[np.ndarray] = None,
+    feature_weights: Optional[Mapping[str, float]] = None
+) -> SweepResult:
+    """
+    Score invoices at every combination of grid values.
+
+    Args:
+        features: One invoice, a sequence, or a FeatureTable
+        grid: Axis name -> values, in the order the result axes should take
+        params: Parameters for everything not on the grid
+        industry_risk: PD multiplier per invoice (default: 1)
+        feature_weights: Weights of the feature score (default: FEATURE_WEIGHTS)
+
+    Returns:
+        SweepResult with one array axis per grid entry
+    """
+    unknown = set(grid) - set(FEATURE_AXES) - set(PARAM_AXES) - {VOLATILITY_AXIS}
+    if unknown:
+        raise ValueError(
+            f"Unknown sweep axes {sorted(unknown)}; choose from features "
+            f"{list(FEATURE_AXES)}, params {list(PARAM_AXES)} or '{VOLATILITY_AXIS}'"
+        )
+
+    single = isinstance(features, InvoiceFeatures)
+    if single:
+        cols = features_to_columns([features])
+    elif isinstance(features, FeatureTable):
+        cols = features.columns()
+    else:
+        cols = features_to_columns(features)
+
+    # Invoices on axis 0, then one axis per grid entry
+    invoices = len(cols['amount'])
+    ndim = 1 + len(grid)
+    cols = {name: col.reshape((-1,) + (1,) * (ndim - 1)) for name, col in cols.items()}
+    if industry_risk is not None:
+        industry_risk = np.asarray(industry_risk, dtype=np.float64).reshape((-1,) + (1,) * (ndim - 1))
+    axes: Dict[str, np.ndarray] = {}
+    overrides: Dict[str, np.ndarray] = {}
+    for position, (name, values) in enumerate(grid.items(), start=1):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 1 or not len(values):
+            raise ValueError(f"Sweep axis {name!r} needs a non-empty 1-D list of values")
+        axes[name] = values
+        shape = [1] * ndim
+        shape[position] = len(values)
+        overrides[name] = values.reshape(shape)
+
+    volatility = overrides.pop(VOLATILITY_AXIS, None)
+    param_values = {name: value for name, value in overrides.items() if name in PARAM_AXES}
+    cols.update((name, value) for name, value in overrides.items() if name in FEATURE_AXES)
+    # Grid values stand in for scalar fields; the kernels broadcast them
+    swept = dataclasses.replace(params, **param_values) if param_values else params
+
+    assessment = score_columns(
+        cols, swept, volatility=volatility,
+        industry_risk=industry_risk if industry_risk is not None else 1.0,
+        feature_weights=feature_weights,
+    )
+
+    # Outputs that do not depend on an axis come back with length 1 there;
+    # expand them (as read-only views) to the full grid
+    shape = (invoices,) + tuple(len(values) for values in axes.values())
+    for f in dataclasses.fields(assessment):
+        value = getattr(assessment, f.name)
+        if isinstance(value, np.ndarray):
+            value = np.broadcast_to(value, shape)
+            setattr(assessment, f.name, value[0] if single else value)
+    return SweepResult(axes=axes, assessment=assessment)
@@ -0,0 +1,244 @@
+"""
+FlowAI Model Training
+Fit feature weights and the score-to-PD mapping from labeled invoices
+
+Invoices whose outcome is known (repaid or defaulted) are turned into the
+feature score signals of FlowAICore.calculate_feature_signals, one NumPy
+column per signal, and a logistic regression of default on them is fitted
+by Newton's method (iteratively reweighted least squares). Every iteration
+is a few matrix products over all invoices, so a million labeled invoices
+train in seconds.
+
+The fit becomes a ModelArtifact: the coefficients, normalized to sum to one
+in absolute value, are its FEATURE_WEIGHTS, their scale and the intercept
+the logistic score-to-PD mapping, and the PD is the learned one alone
+(score_weight 1, Z-Score and DD weights 0):
+
+    artifact, report = train(labels, documents=texts)
+    # or, from features extracted once: train(labels, features=table)
+    artifact.save('model.json.gz')
+    core = FlowAICore(artifact=ModelArtifact.load('model.json.gz'))
+
+Labels are 1 (or True) for defaulted invoices and 0 for repaid ones. From
+the command line, with a FeatureTable snapshot and a labels file (.npy, or
+text with one 0/1 per line):
+
+    python -m flowai.training book.npz outcomes.npy -o model.json.gz
+
+online.py keeps a trained model current from outcomes as they arrive.
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batch import features_to_columns, feature_signals
+from .core import FEATURE_WEIGHTS, FlowAICore, InvoiceFeatures, ModelArtifact, Text
+from .store import FeatureTable
+
+# Ridge penalty on the (unscaled) coefficients, per invoice; keeps the
+# Newton steps well-posed when a signal is constant in the training set
+DEFAULT_L2 = 1e-4
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-8
+
+
+@dataclass
+class TrainingReport:
+    """Fit statistics of a training run"""
+    invoices: int
+    default_rate: float
+    iterations: int
+    converged: bool
+    log_loss: float  # mean, on the training set
+    auc: float  # ROC AUC on the training set
+    seconds: float
+    intercept: float
+    coefficients: Dict[str, float]
+
+
+def signal_matrix(
+    cols: Dict[str, np.ndarray],
+    industry_risk: np.ndarray,
+    artifact: ModelArtifact
+) -> np.ndarray:
+    """Feature score signals as an (invoices, signals) matrix, in FEATURE_WEIGHTS order."""
+    signals = feature_signals(cols, artifact.params, industry_risk)
+    return np.column_stack([signals[name] for name in FEATURE_WEIGHTS]).astype(np.float64, copy=False)
+
+
+def fit_logistic(
+    X: np.ndarray,
+    y: np.ndarray,
+    l2: float = DEFAULT_L2,
+    max_iterations: int = MAX_ITERATIONS,
+    tol: float = TOLERANCE
+) -> Tuple[float, np.ndarray, int, bool]:
+    """
+    L2-regularized logistic regression by Newton's method.
+
+    Minimizes the mean log loss plus l2/2 * |coefficients|^2 (the intercept
+    is not penalized). Each iteration costs two passes over X plus a
+    solve of size X.shape[1] + 1.
+
+    Returns:
+        (intercept, coefficients, iterations, converged)
+    """
+    if l2 <= 0:
+        raise ValueError("l2 must be positive")
+    n, k = X.shape
+    A = np.empty((n, k + 1))
+    A[:, 0] = 1.0
+    A[:, 1:] = X
+    penalty = np.full(k + 1, l2)
+    penalty[0] = 0.0
+
+    mean = y.mean()
+    beta = np.zeros(k + 1)
+    beta[0] = np.log(mean / (1 - mean))
+    converged = False
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        p = 0.5 + 0.5 * np.tanh((A @ beta) / 2)
+        gradient = A.T @ (p - y) / n + penalty * beta
+        hessian = (A.T * (p * (1 - p))) @ A / n + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.abs(step).max() < tol:
+            converged = True
+            break
+    return float(beta[0]), beta[1:], iterations, converged
+
+
+def _log_loss(p: np.ndarray, y: np.ndarray) -> float:
+    p = np.clip(p, 1e-15, 1 - 1e-15)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log1p(-p)))
+
+
+def _auc(p: np.ndarray, y: np.ndarray) -> float:
+    """ROC AUC from (tie-averaged) ranks."""
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+    positives = y.sum()
+    negatives = len(y) - positives
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def fitted_artifact(artifact: ModelArtifact, intercept: float, coefficients: np.ndarray) -> ModelArtifact:
+    """
+    `artifact` with its PD replaced by a fitted logistic model.
+
+    PD = logistic(intercept + scale * sum(weight * signal)), with the weights
+    summing to one in absolute value like the built-in ones. Lateness is
+    one of the signals (temporal_validity), so the separate overdue
+    penalty is dropped.
+    """
+    scale = float(np.abs(coefficients).sum())
+    weights = dict(zip(FEATURE_WEIGHTS, (coefficients / scale).tolist())) if scale else dict(FEATURE_WEIGHTS)
+    params = dataclasses.replace(
+        artifact.params,
+        z_score_weight=0.0,
+        dd_weight=0.0,
+        overdue_pd_penalty=0.0,
+        score_weight=1.0,
+        score_pd_intercept=float(intercept),
+        score_pd_slope=scale,
+    )
+    return dataclasses.replace(artifact, params=params, feature_weights=weights)
+
+
+def train(
+    labels: Union[Sequence[int], np.ndarray],
+    documents: Optional[Iterable[Text]] = None,
+    features: Optional[Union[Sequence[InvoiceFeatures], FeatureTable]] = None,
+    artifact: Optional[ModelArtifact] = None,
+    l2: float = DEFAULT_L2,
+    max_iterations: int = MAX_ITERATIONS
+) -> Tuple[ModelArtifact, TrainingReport]:
+    """
+    Fit feature weights and the PD mapping to labeled invoices.
+
+    Args:
+        labels: 1 (defaulted) or 0 (repaid) per invoice
+        documents: Extracted texts of the invoices
+        features: Pre-extracted features instead (a FeatureTable keeps a
+            million invoices in about 80MB)
+        artifact: Model whose extraction and industry multipliers are used
+            and which the fitted weights replace (default: the built-in one)
+        l2: Ridge penalty on the coefficients
+        max_iterations: Newton iterations at most
+
+    Returns:
+        (fitted artifact, TrainingReport)
+    """
+    if (documents is None) == (features is None):
+        raise ValueError("Pass exactly one of documents or features")
+    started = time.perf_counter()
+    artifact = artifact if artifact is not None else ModelArtifact()
+    core = FlowAICore(artifact=artifact)
+    if documents is not None:
+        features = FeatureTable.from_features(core.extract_features(text) for text in documents)
+    cols = features.columns() if isinstance(features, FeatureTable) else features_to_columns(features)
+
+    y = np.asarray(labels, dtype=np.float64)
+    if y.shape != (len(cols['amount']),):
+        raise ValueError(f"Got {len(y)} labels for {len(cols['amount'])} invoices")
+    if not np.isin(y, (0.0, 1.0)).all():
+        raise ValueError("Labels must be 0 (repaid) or 1 (defaulted)")
+    if y.min() == y.max():
+        raise ValueError("Training needs both repaid and defaulted invoices")
+
+    X = signal_matrix(cols, core._industry_risk_column(features), artifact)
+    intercept, coefficients, iterations, converged = fit_logistic(X, y, l2, max_iterations)
+    p = 0.5 + 0.5 * np.tanh((intercept + X @ coefficients) / 2)
+
+    trained = fitted_artifact(artifact, intercept, coefficients)
+    report = TrainingReport(
+        invoices=len(y),
+        default_rate=float(y.mean()),
+        iterations=iterations,
+        converged=converged,
+        log_loss=_log_loss(p, y),
+        auc=_auc(p, y),
+        seconds=time.perf_counter() - started,
+        intercept=intercept,
+        coefficients=dict(zip(FEATURE_WEIGHTS, coefficients.tolist())),
+    )
+    return trained, report
+
+
+def _load_labels(path: Path) -> np.ndarray:
+    if path.suffix == '.npy':
+        return np.load(path, allow_pickle=False)
+    return np.loadtxt(path, dtype=np.float64, ndmin=1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Fit FlowAI Core feature weights to labeled invoices')
+    parser.add_argument('features', type=Path, help='FeatureTable snapshot (.npz)')
+    parser.add_argument('labels', type=Path, help='outcomes, 1 = defaulted (.npy or one per line)')
+    parser.add_argument('-o', '--output', type=Path, required=True, help='artifact to write (.json or .json.gz)')
+    parser.add_argument('--artifact', type=Path, help='model to start from (default: built-in)')
+    parser.add_argument('--l2', type=float, default=DEFAULT_L2, help='ridge penalty (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    base = ModelArtifact.load(args.artifact) if args.artifact else None
+    artifact, report = train(
+        _load_labels(args.labels), features=FeatureTable.load(args.features), artifact=base, l2=args.l2,
+    )
+    artifact.save(args.output)
+    print('Trained on %d invoices (%.1f%% defaulted) in %.2fs: log loss %.4f, AUC %.3f%s' % (
+        report.invoices, report.default_rate * 100, report.seconds, report.log_loss, report.auc,
+        '' if report.converged else ' (not converged)'))
+    print('Wrote model %s to %s' % (artifact.version, args.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import time
+import datetime
 import asyncio
 import logging
 import os
 import io
+import hashlib
+import hmac
 import pypdf
 import httpx
 import json
 
 # FlowAI - Local AI Engine
-from flowai.engine import FlowAIEngine, AnalysisMode, get_flowai_engine
+from flowai.engine import FlowAIEngine, AnalysisMode, PROMPT_CHARS, get_flowai_engine
+from flowai.cache import ResultCache
+from flowai.core import FeatureAccumulator, FlowAICore, InvoiceFeatures, ModelArtifact, get_flowai_core, reload_flowai_core
 from flowai.models import ModelRegistry, ModelCapability
+from flowai.online import OnlineCalibrator
+from flowai.portfolio import Portfolio
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -70,6 +78,24 @@ else:
 # FlowAI Engine instance
 flowai_engine: Optional[FlowAIEngine] = None
 
+# Marketplace listings for portfolio analytics
+MARKETPLACE_DATA = os.getenv(
+    "MARKETPLACE_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "marketplace_data_full.json")
+)
+portfolio: Optional[Portfolio] = None
+
+# Online PD calibration from settled invoices. Off unless
+# FLOWAI_OUTCOMES_TOKEN is set (callers send it as X-FlowAI-Token).
+# Snapshots go to FLOWAI_CALIBRATION_ARTIFACT only; one is served after an
+# explicit, validated POST /flowai/outcomes/promote.
+OUTCOMES_TOKEN = os.getenv("FLOWAI_OUTCOMES_TOKEN", "")
+calibrator: Optional[OnlineCalibrator] = None
+
+# Responses by PDF content digest and date, reused for byte-identical
+# re-submissions when FLOWAI_DUPLICATE_INDEX is set
+reusable_responses = ResultCache(maxsize=1024)
+
 class AnalysisResponse(BaseModel):
     risk_score: str
     valuation: int
@@ -79,6 +105,7 @@ class AnalysisResponse(BaseModel):
     quantum_score: Optional[float] = None
     model_used: Optional[str] = None
     source: str = "local"
+    near_duplicates: Optional[List[str]] = None
 
 class FlowAIStatus(BaseModel):
     mode: str
@@ -88,6 +115,13 @@ class FlowAIStatus(BaseModel):
     gemini_available: bool
     available_vram_gb: float
 
+class OutcomeRequest(BaseModel):
+    text: str
+    defaulted: bool
+    # Date the invoice was scored (the as_of of its analysis), so it is
+    # learned from with the age it was graded at, not its age at settlement
+    scored_on: datetime.date
+
 class DeployRequest(BaseModel):
     deploy: dict
 
@@ -129,6 +163,21 @@ async def startup_event():
         logger.info(f"🔗 Casper RPC Proxy Ready - Endpoints: {endpoint_urls}")
         logger.warning("   ⚠️ No CSPR_CLOUD_ACCESS_TOKEN set. Using public nodes (may timeout).")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Persist the near-duplicate and counterparty indexes for the next start
+    path = os.getenv("FLOWAI_DUPLICATE_INDEX")
+    core = get_flowai_core()
+    if path and core.duplicates is not None:
+        core.duplicates.save(path)
+        logger.info(f"💾 Saved {len(core.duplicates)} document fingerprints to {path}")
+    path = os.getenv("FLOWAI_COUNTERPARTY_INDEX")
+    if path and core.counterparties is not None:
+        core.counterparties.save(path)
+        logger.info(f"💾 Saved {len(core.counterparties)} counterparties to {path}")
+    if calibrator is not None and await run_in_threadpool(calibrator.flush) is not None:
+        logger.info(f"💾 Saved PD calibration after {calibrator.events} outcomes")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "flowfi-nodeops-agent", "timestamp": time.time()}
@@ -272,8 +321,26 @@ async def get_deploy_status(request: DeployStatusRequest):
     
     raise HTTPException(status_code=404, detail="Deploy not found or RPC unavailable")
 
+def read_invoice_pdf(content: bytes, core: FlowAICore) -> Tuple[FeatureAccumulator, InvoiceFeatures, str]:
+    """
+    Extract FlowAI Core features (and the fingerprint, for the near-duplicate
+    check) page by page while the PDF is parsed. Pages are dropped once
+    scanned: only the first PROMPT_CHARS of text are kept, for LLM prompts.
+    """
+    pdf_reader = pypdf.PdfReader(io.BytesIO(content))
+    accumulator = FeatureAccumulator(core, fingerprint=core.duplicates is not None)
+    head = ""
+    for page in pdf_reader.pages:
+        page_text = page.extract_text() + "\n"
+        accumulator.feed(page_text)
+        if len(head) < PROMPT_CHARS:
+            head += page_text[:PROMPT_CHARS - len(head)]
+    return accumulator, accumulator.finalize(), head
+
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_invoice(file: UploadFile = File(...)):
+    response_key = None
+    near_duplicates = None
     try:
         import google.generativeai as genai
         
@@ -281,21 +348,43 @@ async def analyze_invoice(file: UploadFile = File(...)):
         if not api_key:
             raise Exception("No Gemini API Key found")
 
-        # Read PDF Content
+        # Read PDF Content (parsing and scanning are CPU-bound: off the event loop)
         content = await file.read()
-        pdf_reader = pypdf.PdfReader(io.BytesIO(content))
-        extracted_text = ""
-        for page in pdf_reader.pages:
-            extracted_text += page.extract_text() + "\n"
+        core = get_flowai_core()
+        accumulator, features, prompt_text = await run_in_threadpool(read_invoice_pdf, content, core)
             
-        logger.info(f"Extracted {len(extracted_text)} chars from PDF")
+        logger.info(f"Extracted {accumulator.text_length} chars from PDF")
+
+        # Re-submitted or lightly edited invoices may be financed twice
+        if core.duplicates is not None:
+            pdf_digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+            document_id = f"{file.filename}#{pdf_digest}"
+            matches = core.find_duplicates(document_id=document_id, fingerprint=accumulator.fingerprint)
+            if matches:
+                near_duplicates = [match for match, _ in matches]
+                logger.warning(f"⚠️ {file.filename} is a near-duplicate of {near_duplicates[:5]}")
+            # Fingerprints 0 bits apart can still differ in the total: only
+            # the same PDF bytes reuse an earlier response
+            response_key = (pdf_digest, datetime.date.today())
+            reused = reusable_responses.get(response_key)
+            if reused is not None:
+                logger.info(f"♻️ Reusing the assessment of an identical upload of {file.filename}")
+                return AnalysisResponse(**{**reused.__dict__, "near_duplicates": near_duplicates})
 
         # Use FlowAI for analysis
         if flowai_engine:
             logger.info("🧠 Using FlowAI for analysis...")
+            if features.truncated:
+                logger.warning(
+                    f"Feature extraction stopped early on {file.filename}: "
+                    "scanning budget or text limit reached"
+                )
             result = await flowai_engine.analyze_document(
-                document_text=extracted_text,
-                document_type="invoice"
+                document_text=prompt_text,
+                document_type="invoice",
+                features=features,
+                as_of=datetime.date.today(),
+                digest=accumulator.digest
             )
             
             response = AnalysisResponse(
@@ -336,7 +425,9 @@ async def analyze_invoice(file: UploadFile = File(...)):
             }
             """
             
-            response_ai = model.generate_content(prompt + f"\nContext/Invoice Text: {extracted_text}")
+            response_ai = await run_in_threadpool(
+                model.generate_content, prompt + f"\nContext/Invoice Text: {prompt_text}"
+            )
             text = response_ai.text.replace("```json", "").replace("```", "").strip()
             
             try:
@@ -368,6 +459,9 @@ async def analyze_invoice(file: UploadFile = File(...)):
             source="fallback"
         )
     
+    response.near_duplicates = near_duplicates
+    if response_key is not None and response.source != "fallback":
+        reusable_responses.put(response_key, response)
     return response
 
 
@@ -449,6 +543,115 @@ async def get_recommended_stack():
     }
 
 
+def require_outcomes_token(token: Optional[str]) -> None:
+    """Reject outcome calls unless enabled and authenticated"""
+    if not OUTCOMES_TOKEN:
+        raise HTTPException(status_code=404, detail="Outcome recording is disabled")
+    if token is None or not hmac.compare_digest(token.encode(), OUTCOMES_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-FlowAI-Token")
+
+
+def get_calibrator() -> OnlineCalibrator:
+    """Start online calibration from the served model on first use"""
+    global calibrator
+    if calibrator is None:
+        path = os.getenv("FLOWAI_CALIBRATION_ARTIFACT") or None
+        served = os.getenv("FLOWAI_MODEL_ARTIFACT") or None
+        if path and served and os.path.realpath(path) == os.path.realpath(served):
+            raise HTTPException(
+                status_code=500,
+                detail="FLOWAI_CALIBRATION_ARTIFACT must not be the served FLOWAI_MODEL_ARTIFACT"
+            )
+        calibrator = OnlineCalibrator(artifact=get_flowai_core().artifact, path=path)
+    return calibrator
+
+
+@app.post("/flowai/outcomes")
+async def record_outcome(outcome: OutcomeRequest, x_flowai_token: Optional[str] = Header(None)):
+    """Learn from a settled invoice: repaid (defaulted=false) or defaulted"""
+    require_outcomes_token(x_flowai_token)
+    current = get_calibrator()
+    features = get_flowai_core().extract_features(outcome.text, as_of=outcome.scored_on)
+    # A due snapshot writes the candidate artifact: keep it off the event loop
+    predicted = await run_in_threadpool(current.record, features, outcome.defaulted)
+    report = current.report()
+    return {
+        "success": True,
+        "predicted_pd": predicted,
+        "events": report.events,
+        "log_loss": report.log_loss,
+        "baseline_log_loss": report.baseline_log_loss,
+        "candidate_version": report.version,
+    }
+
+
+@app.post("/flowai/outcomes/promote")
+async def promote_calibration(x_flowai_token: Optional[str] = Header(None)):
+    """Serve the last calibration snapshot, if it beat the served model"""
+    global calibrator
+    require_outcomes_token(x_flowai_token)
+    if calibrator is None or calibrator.path is None:
+        raise HTTPException(status_code=409, detail="No calibration snapshot to promote")
+    try:
+        candidate = await run_in_threadpool(ModelArtifact.load, calibrator.path)
+        calibrator.validate(candidate)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=f"Snapshot not promoted: {e}")
+    # Persist it as the served artifact (other workers reload it from there)
+    served = os.getenv("FLOWAI_MODEL_ARTIFACT") or None
+    if served:
+        await run_in_threadpool(candidate.save, served)
+    engine = await run_in_threadpool(reload_flowai_core, served or candidate)
+    # Later outcomes calibrate, and are validated against, the promoted model
+    calibrator = None
+    logger.info(f"📈 Promoted calibrated model {engine.artifact.version}")
+    return {"success": True, "model_version": engine.artifact.version}
+
+
+# ============ Portfolio Endpoints ============
+
+def get_portfolio() -> Portfolio:
+    """Load the marketplace listings on first use"""
+    global portfolio
+    if portfolio is None:
+        if os.path.exists(MARKETPLACE_DATA):
+            portfolio = Portfolio.from_json(MARKETPLACE_DATA)
+            logger.info(f"📊 Portfolio loaded: {len(portfolio)} listings from {MARKETPLACE_DATA}")
+        else:
+            portfolio = Portfolio()
+    return portfolio
+
+
+@app.get("/portfolio/metrics")
+async def get_portfolio_metrics(status: str = "all", top: int = 10):
+    """Expected loss, vendor concentration and term exposure of the listings"""
+    try:
+        return get_portfolio().metrics(status, top=top).to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/portfolio/listings")
+async def add_portfolio_listings(listings: List[Dict[str, Any]]):
+    """Add marketplace listings to the portfolio"""
+    current = get_portfolio()
+    try:
+        current.extend(listings)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid listing: {e}")
+    return {"success": True, "listings": len(current)}
+
+
+@app.post("/portfolio/listings/{listing_id}/fund")
+async def fund_portfolio_listing(listing_id: str):
+    """Mark a listing funded"""
+    current = get_portfolio()
+    if listing_id not in current:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    current.fund(listing_id)
+    return {"success": True, "listing_id": listing_id}
+
+
 if __name__ == "__main__":
     import uvicorn
     host = os.getenv("API_HOST", "0.0.0.0")